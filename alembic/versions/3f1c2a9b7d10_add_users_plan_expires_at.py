@@ -0,0 +1,65 @@
+"""add users.plan_expires_at
+
+Revision ID: 3f1c2a9b7d10
+Revises:
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from datetime import timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9b7d10'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    # En una BD nueva las tablas las crea Base.metadata.create_all al iniciar la app
+    if "users" not in inspector.get_table_names():
+        return
+
+    columns = {column["name"] for column in inspector.get_columns("users")}
+    if "plan_expires_at" not in columns:
+        with op.batch_alter_table("users") as batch_op:
+            batch_op.add_column(sa.Column("plan_expires_at", sa.DateTime(), nullable=True))
+
+    indexes = {index["name"] for index in inspector.get_indexes("users")}
+    if "ix_users_plan_expires_at" not in indexes:
+        op.create_index("ix_users_plan_expires_at", "users", ["plan_expires_at"])
+
+    # Backfill: plan_assigned_at + plans.validity_days (calculado en Python para ser portable)
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT users.id, users.plan_assigned_at, plans.validity_days "
+        "FROM users JOIN plans ON plans.id = users.plan_id "
+        "WHERE users.plan_assigned_at IS NOT NULL "
+        "AND users.plan_expires_at IS NULL "
+        "AND plans.validity_days IS NOT NULL"
+    ).columns(plan_assigned_at=sa.DateTime)).fetchall()
+
+    updates = [
+        {"id": row.id, "expires_at": row.plan_assigned_at + timedelta(days=row.validity_days)}
+        for row in rows
+    ]
+    if updates:
+        bind.execute(
+            sa.text("UPDATE users SET plan_expires_at = :expires_at WHERE id = :id")
+            .bindparams(sa.bindparam("expires_at", type_=sa.DateTime)),
+            updates,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_index("ix_users_plan_expires_at")
+        batch_op.drop_column("plan_expires_at")
+
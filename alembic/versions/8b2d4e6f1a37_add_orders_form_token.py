@@ -0,0 +1,48 @@
+"""add orders form_token
+
+Revision ID: 8b2d4e6f1a37
+Revises: 3f1c2a9b7d10
+Create Date: 2026-10-18 14:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2d4e6f1a37'
+down_revision: Union[str, Sequence[str], None] = '3f1c2a9b7d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def form_token_columns() -> list[sa.Column]:
+    return [
+        sa.Column("form_token", sa.String(length=512), nullable=True),
+        sa.Column("form_token_expires_at", sa.DateTime(), nullable=True),
+        sa.Column("form_token_amount", sa.Integer(), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    # En una BD nueva las tablas las crea Base.metadata.create_all al iniciar la app
+    if "orders" not in inspector.get_table_names():
+        return
+
+    columns = {column["name"] for column in inspector.get_columns("orders")}
+    missing = [column for column in form_token_columns() if column.name not in columns]
+    if missing:
+        with op.batch_alter_table("orders") as batch_op:
+            for column in missing:
+                batch_op.add_column(column)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("orders") as batch_op:
+        for column in reversed(form_token_columns()):
+            batch_op.drop_column(column.name)
@@ -0,0 +1,72 @@
+"""add hot query indexes
+
+Revision ID: c4a7e2d9f0b3
+Revises: 8b2d4e6f1a37
+Create Date: 2026-10-18 18:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a7e2d9f0b3'
+down_revision: Union[str, Sequence[str], None] = '8b2d4e6f1a37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (nombre, tabla, columnas): los mismos Index que declaran los modelos
+HOT_QUERY_INDEXES = [
+    ("ix_orders_user_status_id", "orders", ["user_id", "status", "id"]),
+    ("ix_orders_status_created_at", "orders", ["status", "created_at"]),
+    ("ix_items_owner_id", "items", ["owner_id"]),
+    ("ix_items_created_by", "items", ["created_by"]),
+    ("ix_security_logs_created_at", "security_logs", ["created_at"]),
+    ("ix_consent_logs_user_policy", "consent_logs", ["user_id", "policy_type"]),
+]
+
+
+def is_postgresql() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    pending = []
+    for name, table, columns in HOT_QUERY_INDEXES:
+        # En una BD nueva las tablas (y sus índices) las crea Base.metadata.create_all al iniciar la app
+        if table not in tables:
+            continue
+        if name not in {index["name"] for index in inspector.get_indexes(table)}:
+            pending.append((name, table, columns))
+
+    if not pending:
+        return
+
+    if is_postgresql():
+        # CONCURRENTLY no bloquea escrituras en tablas grandes, pero no puede correr
+        # dentro de una transacción. Si falla a medias deja un índice INVALID:
+        # borrarlo (DROP INDEX CONCURRENTLY) y volver a correr la migración
+        with op.get_context().autocommit_block():
+            for name, table, columns in pending:
+                op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for name, table, columns in pending:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if is_postgresql():
+        with op.get_context().autocommit_block():
+            for name, table, _ in reversed(HOT_QUERY_INDEXES):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        for name, table, _ in reversed(HOT_QUERY_INDEXES):
+            op.drop_index(name, table_name=table)
@@ -1,10 +1,12 @@
+import logging
 from fastapi import APIRouter, Form, HTTPException
 from fastapi.responses import HTMLResponse, JSONResponse
-from app.services.mailing.mail_service import send_mail
+from app.services.mailing.mail_outbox import mail_outbox
 from app.utils.recaptcha_util import verify_recaptcha
 from app.core.config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api", tags=["Contact API"])
 
@@ -15,7 +17,7 @@ async def api_contact_form(
     message: str = Form(...),
     g_recaptcha_response_contact: str = Form(...)
 ):
-    print("Token recibido:", g_recaptcha_response_contact)
+    logger.debug("Token reCAPTCHA recibido (%s caracteres)", len(g_recaptcha_response_contact))
 
     # Verificar reCAPTCHA
     if not await verify_recaptcha(g_recaptcha_response_contact, "contact"):
@@ -26,8 +28,8 @@ async def api_contact_form(
     body = f"Nombre: {name}\nCorreo: {email}\n\nMensaje:\n{message}"
     receiver = settings.RECIEVER_EMAIL
 
-    # Enviar correo
-    if send_mail(subject, body, to_email=receiver):
+    # Encolar correo (el outbox lo envía en segundo plano)
+    if mail_outbox.enqueue(subject, body, to_email=receiver):
             return HTMLResponse(
                 content='<span class="text-green-400">✅ Mensaje enviado correctamente</span>'
             )
@@ -0,0 +1,24 @@
+import secrets
+from fastapi import APIRouter, HTTPException, Request, Response
+from app.core.config import get_settings
+from app.core.metrics import render_metrics
+
+settings = get_settings()
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    # Sin METRICS_TOKEN el endpoint no existe; con token, sólo "Authorization: Bearer <token>"
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404)
+
+    # En bytes: compare_digest con str no acepta caracteres no ASCII (sería un 500, no un 401).
+    # Starlette decodifica los headers como latin-1, así se recuperan los bytes originales
+    authorization = request.headers.get("authorization", "").encode("latin-1")
+    if not secrets.compare_digest(authorization, f"Bearer {settings.METRICS_TOKEN}".encode()):
+        raise HTTPException(status_code=401, detail="No autorizado")
+
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
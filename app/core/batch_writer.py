@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import random
+import threading
+from typing import Optional
+from sqlalchemy import insert
+from app.core.database import SessionLocal
+from app.core.metrics import BATCH_WRITER_DROPPED, BATCH_WRITER_FAILED, BATCH_WRITER_PENDING
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_DROP = "drop"
+OVERFLOW_SAMPLE = "sample"
+
+
+class BatchWriter:
+    """
+    Write-behind para tablas de sólo inserción (logs, consentimientos).
+
+    Las filas se acumulan en memoria y se escriben con un INSERT masivo al llegar
+    a batch_size o cada flush_interval segundos, en un hilo para no bloquear el loop.
+    Con el buffer lleno (max_pending) aplica la política de overflow:
+      - drop:   descarta las filas nuevas y las cuenta
+      - sample: conserva una muestra uniforme (reservoir) de la ráfaga
+    Si el writer no está iniciado (scripts, tests sin lifespan) escribe en línea.
+    """
+
+    def __init__(self, model, *, batch_size: int, flush_interval: float, max_pending: int,
+                 overflow: str = OVERFLOW_DROP):
+        self.model = model
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.overflow = overflow
+        self._buffer: list[dict] = []
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._overflowed = 0  # filas vistas con el buffer lleno (base del muestreo)
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+        self._dropped_metric = BATCH_WRITER_DROPPED.labels(self.name)
+        self._failed_metric = BATCH_WRITER_FAILED.labels(self.name)
+        self._pending_metric = BATCH_WRITER_PENDING.labels(self.name)
+
+    @property
+    def name(self) -> str:
+        return self.model.__tablename__
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        # Lo pendiente se escribe antes de apagar
+        await self._loop.run_in_executor(None, self.flush)
+        self._loop = None
+
+    def add(self, **values):
+        if self._task is None:
+            self._write([values])
+            return
+
+        with self._lock:
+            if len(self._buffer) < self.max_pending:
+                self._buffer.append(values)
+            else:
+                self._overflow(values)
+            full = len(self._buffer) >= self.batch_size
+            self._pending_metric.set(len(self._buffer))
+
+        if full:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _overflow(self, values: dict):
+        self._overflowed += 1
+        self.dropped += 1
+        self._dropped_metric.inc()
+        if self.overflow == OVERFLOW_SAMPLE:
+            slot = random.randrange(self.max_pending + self._overflowed)
+            if slot < self.max_pending:
+                self._buffer[slot] = values
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._buffer),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self._loop.run_in_executor(None, self.flush)
+
+    def flush(self):
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            self._overflowed = 0
+            self._pending_metric.set(0)
+        for start in range(0, len(rows), self.batch_size):
+            self._write(rows[start:start + self.batch_size])
+
+    def _write(self, rows: list[dict]):
+        if not rows:
+            return
+        db = SessionLocal()
+        try:
+            db.execute(insert(self.model), rows)
+            db.commit()
+            self.written += len(rows)
+            self.flushes += 1
+        except Exception:
+            db.rollback()
+            self.failed += len(rows)
+            self._failed_metric.inc(len(rows))
+            logger.exception("No se pudieron escribir %s filas en %s", len(rows), self.name)
+        finally:
+            db.close()
@@ -9,9 +9,72 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_DAYS: int 
+    # Incluye uid/plan en el access token; su duración acota cuán desactualizados pueden estar
+    AUTH_STATELESS_CLAIMS: bool = False
+
+    # bcrypt: costo fijo, o calibrado al iniciar si PASSWORD_HASH_TARGET_MS > 0.
+    # El hashing corre en un pool propio; sobre MAX_PENDING en cola se responde 503
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_TARGET_MS: int = 0
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
     DATABASE_URL: str = "sqlite:///./test.db"
     ENVIRONMENT: str = "development"
 
+    # Logging: LOG_FORMAT text|json para los logs de la app; el access log siempre es JSON.
+    # Los 2xx más rápidos que ACCESS_LOG_SLOW_MS se muestrean con ACCESS_LOG_SAMPLE_RATE_2XX (0..1)
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "text"
+    ACCESS_LOG_ENABLED: bool = True
+    ACCESS_LOG_SAMPLE_RATE_2XX: float = 1.0
+    ACCESS_LOG_SLOW_MS: float = 1000.0
+
+    # Métricas Prometheus en /metrics (requiere METRICS_TOKEN como Bearer; vacío = deshabilitado).
+    # Multiproceso: definir PROMETHEUS_MULTIPROC_DIR antes de arrancar los workers
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str = ""
+    METRICS_SAMPLE_SECONDS: float = 1.0
+
+    # Profiling por request: header X-Profile-Token == PROFILE_ADMIN_TOKEN, o una fracción
+    # PROFILE_SAMPLE_RATE (0..1) al azar. Ambos vacíos/0 = middleware sin registrar.
+    # PROFILE_FORMAT speedscope|collapsed
+    PROFILE_ADMIN_TOKEN: str = ""
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_DIR: str = "profiles"
+    PROFILE_FORMAT: str = "speedscope"
+    PROFILE_INTERVAL_MS: float = 2.0
+
+    # SQL: log de queries más lentas que DB_SLOW_QUERY_MS y aviso de posible N+1 cuando
+    # la misma consulta se repite DB_REPEATED_QUERY_THRESHOLD veces en un request (0 = apagado)
+    DB_SLOW_QUERY_MS: float = 200.0
+    DB_REPEATED_QUERY_THRESHOLD: int = 5
+
+    # Pool de conexiones. DB_PGBOUNCER: PgBouncer en modo transaction hace de pool
+    # (NullPool, sin prepared statements). THREADPOOL_TOKENS: hilos para handlers sync
+    # (0 = el default de anyio, 40); al iniciar se avisa si DB_POOL_SIZE + DB_MAX_OVERFLOW
+    # no alcanza para todos
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 10.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_PGBOUNCER: bool = False
+    THREADPOOL_TOKENS: int = 0
+
+    # SQLite (archivo): WAL y pragmas en cada conexión; con SQLITE_SINGLE_WRITER las
+    # escrituras van a una conexión dedicada y las lecturas al pool
+    SQLITE_PRAGMAS: bool = True
+    SQLITE_SINGLE_WRITER: bool = True
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 16384
+    SQLITE_MMAP_SIZE: int = 268435456
+
+    # Réplicas de lectura (URLs separadas por coma; vacío = todo al primario). Tras escribir,
+    # el usuario lee del primario durante DB_REPLICA_READ_YOUR_WRITES_SECONDS
+    DATABASE_REPLICA_URLS: str = ""
+    DB_REPLICA_READ_YOUR_WRITES_SECONDS: float = 5.0
+    DB_REPLICA_HEALTH_CHECK_SECONDS: float = 10.0
+
     #SMTP config
     SMTP_PROVIDER: str = ""
     RECIEVER_EMAIL: str = ""
@@ -28,6 +91,19 @@ class Settings(BaseSettings):
     SMTP_USER_HOSTINGER: str = ""
     SMTP_PASS_HOSTINGER: str = ""
 
+    # SMTP local sin TLS (python -m app.services.mailing.smtp_sink)
+    SMTP_HOST_LOCAL: str = "127.0.0.1"
+    SMTP_PORT_LOCAL: int = 1025
+
+    # Outbox: los handlers encolan y un worker envía por conexiones SMTP reutilizadas
+    MAIL_OUTBOX_MAX_SIZE: int = 1000
+    MAIL_SMTP_POOL_SIZE: int = 2
+    MAIL_SMTP_TIMEOUT_SECONDS: float = 15.0
+    MAIL_SMTP_IDLE_SECONDS: int = 60
+    MAIL_MAX_ATTEMPTS: int = 4
+    MAIL_RETRY_BACKOFF_SECONDS: float = 2.0
+    MAIL_DRAIN_TIMEOUT_SECONDS: float = 10.0
+
     #payments
     PAYMENT_GATEWAY: str = ""
     IZIPAY_ENV: str = "TEST"
@@ -37,6 +113,17 @@ class Settings(BaseSettings):
     IZIPAY_PASSWORD: str = ""
     IZIPAY_PUBLIC_KEY: str = ""
     IZIPAY_HMACSHA256: str = ""
+    # live | mock (pasarela simulada en proceso, ver services/payments/izipay_mock.py)
+    IZIPAY_BACKEND: str = "live"
+    IZIPAY_HTTP2: bool = False
+    IZIPAY_TIMEOUT_SECONDS: float = 10.0
+    IZIPAY_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    IZIPAY_MAX_CONNECTIONS: int = 20
+    IZIPAY_MAX_RETRIES: int = 2
+    IZIPAY_RETRY_BACKOFF_SECONDS: float = 0.2
+    IZIPAY_MOCK_LATENCY_MS: int = 0
+    # Izipay da 15 min de validez al formToken; se reutiliza con margen
+    IZIPAY_FORM_TOKEN_TTL_SECONDS: int = 840
 
     HAS_FREE_DEMO: bool = False
     FREE_PLAN_NAME: str = ""
@@ -44,6 +131,41 @@ class Settings(BaseSettings):
 
     RECAPTCHA_SECRET_KEY: str = ""
     RECAPTCHA_SITE_KEY: str = ""
+    # google | fake (siteverify en proceso, para tests y benchmarks sin red)
+    RECAPTCHA_BACKEND: str = "google"
+    RECAPTCHA_VERIFY_URL: str = "https://www.google.com/recaptcha/api/siteverify"
+    RECAPTCHA_TIMEOUT_SECONDS: float = 3.0
+    RECAPTCHA_MAX_IN_FLIGHT: int = 20
+    RECAPTCHA_MIN_SCORE: float = 0.5
+    # Si Google no responde: True deja pasar, False rechaza
+    RECAPTCHA_FAIL_OPEN: bool = False
+
+    # Caché de usuarios en proceso (TTL <= 0 la desactiva)
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 1024
+
+    # SecurityLog en lotes: se escribe al juntar BATCH_SIZE eventos o cada FLUSH_SECONDS.
+    # Con MAX_PENDING en memoria: drop (descarta y cuenta) o sample (muestra de la ráfaga)
+    SECURITY_LOG_BATCH_SIZE: int = 200
+    SECURITY_LOG_FLUSH_SECONDS: float = 1.0
+    SECURITY_LOG_MAX_PENDING: int = 10000
+    SECURITY_LOG_OVERFLOW: str = "drop"
+
+    # ConsentLog del banner de cookies en lotes (mismo writer que SecurityLog)
+    CONSENT_LOG_BATCH_SIZE: int = 100
+    CONSENT_LOG_FLUSH_SECONDS: float = 2.0
+    CONSENT_LOG_MAX_PENDING: int = 10000
+
+    # Catálogo de planes en memoria
+    PLAN_CATALOG_TTL_SECONDS: int = 300
+
+    # Security headers: CSP por clase de ruta (vacío = política por defecto de utils/constants.py).
+    # Con CSP_NONCE_ENABLED, las políticas con {nonce} reciben un nonce nuevo por response
+    # en request.state.csp_nonce; sin él se quita el 'nonce-{nonce}' y no cuesta nada
+    CSP_DEFAULT: str = ""
+    CSP_CHECKOUT: str = ""
+    CSP_DOCS: str = ""
+    CSP_NONCE_ENABLED: bool = False
 
     class Config:
         env_file = ".env"
@@ -1,9 +1,53 @@
 import contextvars
+import time
 
 _user_id_ctx_var = contextvars.ContextVar("user_id", default=None)
+_user_ctx_var = contextvars.ContextVar("user", default=None)
 
 def set_current_user_id(user_id: int):
     _user_id_ctx_var.set(user_id)
 
 def get_current_user_id() -> int | None:
     return _user_id_ctx_var.get()
+
+# Usuario autenticado resuelto una sola vez por request (instancia desacoplada de sesión)
+def set_request_user(user):
+    _user_ctx_var.set(user)
+    set_current_user_id(user.id if user else None)
+
+def get_request_user():
+    return _user_ctx_var.get()
+
+# Contadores por request (p. ej. consultas SQL). El objeto es mutable y compartido:
+# los handlers sync corren en el threadpool con una copia del contexto y suman sobre el mismo
+class RequestStats:
+    __slots__ = ("db_queries", "db_writes", "db_time", "query_shapes")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_writes = 0
+        self.db_time = 0.0
+        self.query_shapes: dict[str, int] = {}
+
+_request_stats_ctx_var = contextvars.ContextVar("request_stats", default=None)
+
+def start_request_stats() -> RequestStats:
+    stats = RequestStats()
+    _request_stats_ctx_var.set(stats)
+    return stats
+
+def get_request_stats() -> RequestStats | None:
+    return _request_stats_ctx_var.get()
+
+# Read-your-writes con réplicas: hasta este instante (epoch) el usuario lee del primario
+_primary_reads_until_ctx_var = contextvars.ContextVar("primary_reads_until", default=0.0)
+
+def pin_reads_to_primary(until: float):
+    _primary_reads_until_ctx_var.set(until)
+
+def reads_pinned_to_primary() -> bool:
+    if _primary_reads_until_ctx_var.get() > time.time():
+        return True
+    # Lo escrito en este mismo request todavía no llegó a las réplicas
+    stats = get_request_stats()
+    return stats is not None and stats.db_writes > 0
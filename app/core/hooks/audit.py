@@ -1,7 +1,12 @@
 from datetime import datetime
-from sqlalchemy import event
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
 from app.models.audit_mixin import AuditMixin
 from app.core.context import get_current_user_id
+from app.models.models import Item, Order, Plan, User
+from app.services.users.user_cache import user_cache
+from app.services.plans.plan_catalog import plan_catalog
+from app.services.users.user_summary_service import UserSummaryService, order_deltas
 
 def before_insert(mapper, connection, target):
     now = datetime.utcnow()
@@ -28,3 +33,89 @@ def register_audit_listeners(models: list):
     for model in models:
         event.listen(model, "before_insert", before_insert)
         event.listen(model, "before_update", before_update)
+
+def invalidate_cached_user(mapper, connection, target):
+    # Si cambió el email también se descarta la entrada indexada por el email anterior
+    history = inspect(target).attrs.email.history
+    for old_email in history.deleted or ():
+        user_cache.invalidate(email=old_email)
+    user_cache.invalidate(user_id=target.id)
+
+def register_user_cache_listeners():
+    event.listen(User, "after_update", invalidate_cached_user)
+    event.listen(User, "after_delete", invalidate_cached_user)
+
+def mark_plan_catalog_dirty(mapper, connection, target):
+    # Se invalida al hacer flush y otra vez tras el commit, para que ninguna
+    # recarga concurrente se quede con la versión previa al commit
+    session = object_session(target)
+    if session is not None:
+        session.info["plan_catalog_dirty"] = True
+    plan_catalog.invalidate()
+
+def invalidate_plan_catalog_after_commit(session):
+    if session.info.pop("plan_catalog_dirty", False):
+        plan_catalog.invalidate()
+
+def register_plan_catalog_listeners():
+    for event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(Plan, event_name, mark_plan_catalog_dirty)
+    event.listen(Session, "after_commit", invalidate_plan_catalog_after_commit)
+
+def item_inserted(mapper, connection, target):
+    UserSummaryService.apply(connection, target.owner_id, {"item_count": 1})
+
+def item_deleted(mapper, connection, target):
+    UserSummaryService.apply(connection, target.owner_id, {"item_count": -1})
+
+def item_updated(mapper, connection, target):
+    # Cambio de dueño (p. ej. owner_id a NULL al borrar el usuario)
+    history = inspect(target).attrs.owner_id.history
+    if history.deleted:
+        UserSummaryService.apply(connection, history.deleted[0], {"item_count": -1})
+        UserSummaryService.apply(connection, target.owner_id, {"item_count": 1})
+
+def order_inserted(mapper, connection, target):
+    UserSummaryService.apply(connection, target.user_id, order_deltas(target.status, 1))
+
+def order_deleted(mapper, connection, target):
+    UserSummaryService.apply(connection, target.user_id, order_deltas(target.status, -1))
+
+def order_updated(mapper, connection, target):
+    state = inspect(target)
+    user_history = state.attrs.user_id.history
+    status_history = state.attrs.status.history
+    if not user_history.deleted and not status_history.deleted:
+        return
+    old_user_id = user_history.deleted[0] if user_history.deleted else target.user_id
+    old_status = status_history.deleted[0] if status_history.deleted else target.status
+    UserSummaryService.apply(connection, old_user_id, order_deltas(old_status, -1))
+    UserSummaryService.apply(connection, target.user_id, order_deltas(target.status, 1))
+
+def user_inserted(mapper, connection, target):
+    # Fila en cero desde el alta: el dashboard siempre la encuentra por clave primaria
+    UserSummaryService.create_empty(connection, target.id)
+
+def user_deleting(mapper, connection, target):
+    # Antes del DELETE de users: la FK del resumen no debe quedar colgando
+    UserSummaryService.remove(connection, target.id)
+
+def keep_previous_value(target, value, oldvalue, initiator):
+    pass
+
+def register_user_summary_listeners():
+    # Los deltas no son idempotentes: registrar dos veces (varios create_app) contaría doble
+    if event.contains(Item, "after_insert", item_inserted):
+        return
+    # active_history: al asignar, carga el valor previo aunque el atributo esté expirado
+    # (p. ej. tras un commit); sin él los listeners de after_update no verían el cambio
+    for attribute in (Item.owner_id, Order.user_id, Order.status):
+        event.listen(attribute, "set", keep_previous_value, active_history=True)
+    event.listen(Item, "after_insert", item_inserted)
+    event.listen(Item, "after_delete", item_deleted)
+    event.listen(Item, "after_update", item_updated)
+    event.listen(Order, "after_insert", order_inserted)
+    event.listen(Order, "after_delete", order_deleted)
+    event.listen(Order, "after_update", order_updated)
+    event.listen(User, "after_insert", user_inserted)
+    event.listen(User, "before_delete", user_deleting)
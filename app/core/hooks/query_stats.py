@@ -0,0 +1,112 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Iterable, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import get_settings
+from app.core.context import RequestStats, get_request_stats
+
+settings = get_settings()
+logger = logging.getLogger("app.db")
+
+
+def parameter_shape(parameters, executemany: bool = False) -> str:
+    # Tipos, no valores: el log no debe llevar emails, hashes ni tokens
+    if executemany and parameters:
+        return f"{len(parameters)}x {parameter_shape(parameters[0])}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    # En el ExecutionContext: es propio de cada ejecución y se descarta si el driver falla
+    context._query_started_at = time.perf_counter()
+
+
+def record_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started_at
+
+    stats = get_request_stats()
+    if stats is not None:
+        stats.db_queries += 1
+        if context.isinsert or context.isupdate or context.isdelete:
+            stats.db_writes += 1
+        stats.db_time += elapsed
+        # El SQL compilado ya viene parametrizado: mismo texto = misma forma de consulta
+        stats.query_shapes[statement] = stats.query_shapes.get(statement, 0) + 1
+
+    elapsed_ms = elapsed * 1000
+    if elapsed_ms >= settings.DB_SLOW_QUERY_MS:
+        shape = parameter_shape(parameters, executemany)
+        logger.warning("Query lenta (%.1f ms): %s -- params %s", elapsed_ms, statement, shape, extra={"fields": {
+            "duration_ms": round(elapsed_ms, 2),
+            "statement": statement,
+            "params": shape,
+        }})
+
+
+def register_query_counter(engine: Engine):
+    # Fuera de un request (workers en segundo plano, scripts) no hay stats: sólo aplica el log de lentas
+    if not event.contains(engine, "before_cursor_execute", start_query_timer):
+        event.listen(engine, "before_cursor_execute", start_query_timer)
+        event.listen(engine, "after_cursor_execute", record_query)
+
+
+def report_repeated_queries(stats: RequestStats, route: str):
+    """Al cerrar el request: la misma consulta repetida muchas veces suele ser un N+1."""
+    threshold = settings.DB_REPEATED_QUERY_THRESHOLD
+    if threshold <= 0:
+        return
+
+    for statement, count in stats.query_shapes.items():
+        if count >= threshold:
+            logger.warning("Posible N+1 en %s: %d ejecuciones de %s", route, count, statement, extra={"fields": {
+                "route": route,
+                "count": count,
+                "statement": statement,
+            }})
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.statements: list[str] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@contextmanager
+def query_budget(max_queries: int, engines: Optional[Iterable[Engine]] = None):
+    """
+    Para tests: falla si el bloque ejecuta más de `max_queries` consultas.
+    Escucha los engines (no el contexto), así cuenta también lo que corre en el
+    hilo del TestClient. Por defecto todos: sync, async, writers y réplicas.
+
+        with query_budget(4):
+            client.get("/dashboard/orders")
+    """
+    if engines is None:
+        from app.core.database import all_engines
+        engines = all_engines()
+
+    recorder = QueryRecorder()
+    engines = list(engines)
+    for engine in engines:
+        event.listen(engine, "after_cursor_execute", recorder)
+    try:
+        yield recorder
+    finally:
+        for engine in engines:
+            event.remove(engine, "after_cursor_execute", recorder)
+
+    if recorder.count > max_queries:
+        listing = "\n".join(f"  {i}. {statement}" for i, statement in enumerate(recorder.statements, 1))
+        raise AssertionError(f"{recorder.count} consultas, presupuesto {max_queries}:\n{listing}")
@@ -0,0 +1,66 @@
+import atexit
+import json
+import logging
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from app.core.config import get_settings
+
+settings = get_settings()
+
+ACCESS_LOGGER = "app.access"
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Un objeto JSON por línea; los campos estructurados van en record.fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def setup_logging():
+    """
+    Los handlers de la app sólo encolan (QueueHandler); un QueueListener en su
+    propio hilo formatea y escribe, así el event loop nunca espera por I/O de logs.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    app_handler = logging.StreamHandler(sys.stderr)
+    if settings.LOG_FORMAT == "json":
+        app_handler.setFormatter(JsonFormatter())
+    else:
+        app_handler.setFormatter(logging.Formatter(
+            "%(asctime)s [%(levelname)s] %(name)s: %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
+        ))
+    app_handler.addFilter(lambda record: record.name != ACCESS_LOGGER)
+
+    access_handler = logging.StreamHandler(sys.stdout)
+    access_handler.setFormatter(JsonFormatter())
+    access_handler.addFilter(lambda record: record.name == ACCESS_LOGGER)
+
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, app_handler, access_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    root.handlers = [QueueHandler(log_queue)]
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    access_logger = logging.getLogger(ACCESS_LOGGER)
+    access_logger.setLevel(logging.INFO if settings.ACCESS_LOG_ENABLED else logging.CRITICAL + 1)
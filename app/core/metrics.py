@@ -0,0 +1,119 @@
+"""
+Métricas Prometheus de la app.
+
+Con varios workers de uvicorn, definir PROMETHEUS_MULTIPROC_DIR (directorio vacío,
+antes de arrancar) activa el modo multiproceso de prometheus_client: cada worker
+escribe sus valores en archivos mmap y /metrics los agrega.
+"""
+import asyncio
+import os
+import time
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    REGISTRY,
+)
+from app.core.config import get_settings
+
+settings = get_settings()
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "Requests HTTP atendidos", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "Latencia de requests HTTP", ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests HTTP en curso", multiprocess_mode="livesum"
+)
+OUTBOUND_LATENCY = Histogram(
+    "outbound_request_duration_seconds", "Latencia de llamadas a servicios externos",
+    ["service", "endpoint", "outcome"], buckets=LATENCY_BUCKETS,
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Conexiones del pool de BD en uso", ["engine"], multiprocess_mode="livesum"
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "Conexiones abiertas por encima de pool_size", ["engine"], multiprocess_mode="livesum"
+)
+DB_POOL_SATURATION = Gauge(
+    "db_pool_saturation", "Conexiones en uso / capacidad del pool (size + overflow)", ["engine"],
+    multiprocess_mode="livemax",
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Espera por una conexión libre del pool de BD", ["engine"],
+    buckets=POOL_WAIT_BUCKETS,
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total", "Checkouts que agotaron DB_POOL_TIMEOUT_SECONDS", ["engine"]
+)
+USER_CACHE_LOOKUPS = Counter(
+    "user_cache_lookups_total", "Búsquedas en la caché de usuarios", ["result"]
+)
+USER_CACHE_EVICTIONS = Counter(
+    "user_cache_evictions_total", "Usuarios desalojados de la caché por USER_CACHE_MAX_SIZE"
+)
+USER_CACHE_SIZE = Gauge(
+    "user_cache_size", "Usuarios en la caché", multiprocess_mode="livesum"
+)
+BATCH_WRITER_DROPPED = Counter(
+    "batch_writer_dropped_total", "Filas descartadas por el overflow del write-behind", ["writer"]
+)
+BATCH_WRITER_FAILED = Counter(
+    "batch_writer_failed_total", "Filas del write-behind que no se pudieron escribir", ["writer"]
+)
+BATCH_WRITER_PENDING = Gauge(
+    "batch_writer_pending", "Filas en el buffer del write-behind", ["writer"], multiprocess_mode="livesum"
+)
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "Retraso del event loop respecto al intervalo esperado", buckets=LAG_BUCKETS
+)
+
+
+def observe_outbound(service: str, endpoint: str, elapsed: float, ok: bool):
+    OUTBOUND_LATENCY.labels(service, endpoint, "ok" if ok else "error").observe(elapsed)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+async def sample_resources(pools: dict, interval: float):
+    """Muestrea los pools de BD ({etiqueta: pool}) y mide el lag del event loop cada `interval` segundos."""
+    from app.core.database import pool_capacity
+    capacities = {label: pool_capacity(pool) for label, pool in pools.items()}
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, time.perf_counter() - start - interval))
+
+        for label, pool in pools.items():
+            if hasattr(pool, "checkedout"):
+                DB_POOL_CHECKED_OUT.labels(label).set(pool.checkedout())
+            if hasattr(pool, "overflow"):
+                DB_POOL_OVERFLOW.labels(label).set(max(0, pool.overflow()))
+            if capacities[label]:
+                DB_POOL_SATURATION.labels(label).set(pool.checkedout() / capacities[label])
+
+
+def mark_worker_dead():
+    # Los gauges "live*" del worker que se apaga dejan de sumarse
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
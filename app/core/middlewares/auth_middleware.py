@@ -1,80 +1,110 @@
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
 from starlette.requests import Request
-from starlette.responses import RedirectResponse, HTMLResponse
-from app.core.security import log_security_event
+from starlette.responses import RedirectResponse, HTMLResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.security import get_request_claims, log_security_event, resolve_request_user
 from app.core.presentation.templates import templates
-from app.core.context import set_current_user_id
 from app.services.auth.token_service import TokenService
-from app.services.users.user_service import UserService
 from app.services.plans.plan_service import PlanService
-from app.services.routing.route_guard_service import RouteGuard
-
- 
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        path = request.url.path
-        token = request.cookies.get("access_token")
-        refresh_token = request.cookies.get("refresh_token")
-        user = None
-        ip = request.client.host
-
-        # Obtener usuario si token válido
-        username = TokenService.get_subject_from_token(token)
-        if username:
-            user = UserService.get_user_by_email(username)
-            if user:
-                set_current_user_id(user.id)
-
-        # Si no hay access_token pero sí refresh, renovar
-        if not user and refresh_token and not path.startswith("/auth/logout"):
-            username = TokenService.get_subject_from_token(refresh_token)
-            if username:
-                user = UserService.get_user_by_email(username)
-                if user:
-                    new_token = TokenService.create_access_token({"sub": username})
-                    request.state.renewed_token = new_token
-                    set_current_user_id(user.id)
+from app.services.routing.route_guard_service import RouteClass, RouteGuard
 
-        # Redirigir si usuario ya autenticado e intenta ir a /login o /register
-        if RouteGuard.is_auth_route(path) and user:
-            return RedirectResponse(url="/dashboard")
 
-        # Permitir rutas públicas
-        if RouteGuard.is_public(path):
-            response = await call_next(request)
-            return self._add_renewed_token_if_needed(request, response)
+class AuthMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        # Proteger rutas privadas
-        if RouteGuard.is_protected(path):
-            if not user:
-                await log_security_event(None, ip, "unauthorized_access",
-                        f"Intento acceso a {path} sin autenticación")
-                return RedirectResponse(url="/auth/login")
+        request = Request(scope)
+        path = scope["path"]
+        route_class = RouteGuard.classify(path).route_class
+        ip = request.client.host if request.client else "unknown"
 
-            plan_status = PlanService.get_plan_status(user)
+        # Con claims stateless el token basta; si no, identidad resuelta una sola vez
+        # por request (compartida con CSRF y dependencias)
+        claims = get_request_claims(request)
+        user = None if claims else resolve_request_user(request)
+        is_authenticated = bool(claims or user)
 
-            if plan_status == "no_plan" and RouteGuard.should_block_plan_access(path):
-                return RedirectResponse(url="/payments/checkout?plan=starter")
+        # Redirigir si usuario ya autenticado e intenta ir a /login o /register
+        if route_class == RouteClass.AUTH and is_authenticated:
+            await RedirectResponse(url="/dashboard")(scope, receive, send)
+            return
 
-            if plan_status == "expired" and RouteGuard.should_block_plan_access(path):
-                content = templates.get_template("errors/403.html").render({
-                    "request": request,
-                    "detail": "Tu plan ha expirado."
-                })
-                return HTMLResponse(content=content, status_code=403)
+        # Proteger rutas privadas (las públicas pasan directo)
+        if route_class in (RouteClass.PROTECTED, RouteClass.PLAN_GATED):
+            response = await self._check_access(request, path, route_class, ip, claims, user)
+            if response is not None:
+                await response(scope, receive, send)
+                return
 
         # Continuar normalmente
-        response = await call_next(request)
-        return self._add_renewed_token_if_needed(request, response)
-
-    def _add_renewed_token_if_needed(self, request, response):
-        if hasattr(request.state, "renewed_token"):
-            response.set_cookie(
-                key="access_token",
-                value=request.state.renewed_token,
-                httponly=True,
-                max_age=TokenService.token_expiry_seconds(),
-                secure=True,
-                samesite="lax"
-            )
-        return response
+        await self.app(scope, receive, self._add_renewed_token_if_needed(request, send))
+
+    async def _check_access(self, request, path, route_class, ip, claims, user) -> Response | None:
+        if not (claims or user):
+            await log_security_event(None, ip, "unauthorized_access",
+                    f"Intento acceso a {path} sin autenticación")
+            return RedirectResponse(url="/auth/login")
+
+        if route_class != RouteClass.PLAN_GATED:
+            return None
+
+        plan_status = self._get_plan_status(request, claims, user)
+
+        if plan_status == "no_plan":
+            return RedirectResponse(url="/payments/checkout?plan=starter")
+
+        if plan_status == "expired":
+            content = templates.get_template("errors/403.html").render({
+                "request": request,
+                "detail": "Tu plan ha expirado."
+            })
+            return HTMLResponse(content=content, status_code=403)
+
+        return None
+
+    def _get_plan_status(self, request, claims, user) -> str:
+        if not claims:
+            return PlanService.get_plan_status(user)
+
+        plan_status = PlanService.get_plan_status_from_claims(claims)
+        if plan_status == "active":
+            return plan_status
+
+        # Los claims sólo pueden quedar atrás tras un pago: antes de bloquear se
+        # confirma contra la BD y, si el plan cambió, se re-emite el token
+        user = resolve_request_user(request)
+        if not user:
+            return plan_status
+        plan_status = PlanService.get_plan_status(user)
+        if plan_status == "active":
+            request.state.renewed_token = TokenService.create_access_token({"sub": user.email}, user=user)
+        return plan_status
+
+    def _add_renewed_token_if_needed(self, request: Request, send: Send) -> Send:
+        # renewed_token puede fijarse más adentro (p. ej. handle_izipay_paid), así que
+        # se revisa al emitir los headers y no antes de llamar a la app
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start" and hasattr(request.state, "renewed_token"):
+                headers = MutableHeaders(scope=message)
+                headers.append("set-cookie", self._renewed_token_cookie(request.state.renewed_token))
+            await send(message)
+
+        return send_wrapper
+
+    @staticmethod
+    def _renewed_token_cookie(token: str) -> str:
+        cookie = Response()
+        cookie.set_cookie(
+            key="access_token",
+            value=token,
+            httponly=True,
+            max_age=TokenService.token_expiry_seconds(),
+            secure=True,
+            samesite="lax"
+        )
+        return cookie.headers["set-cookie"]
@@ -1,42 +1,86 @@
 import logging
+import random
 import time
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-
-# Configuración básica del logger
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S"
-)
-
-class LoggerMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.perf_counter()
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import get_settings
+from app.core.context import start_request_stats
+from app.core.hooks.query_stats import report_repeated_queries
+from app.core.logging_config import ACCESS_LOGGER
+
+settings = get_settings()
+access_logger = logging.getLogger(ACCESS_LOGGER)
+
+
+def route_template(scope: Scope) -> str:
+    # El router deja la ruta resuelta en el scope: "/items/{item_id}" en vez del path concreto
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    return "<unmatched>"
+
 
-        method = request.method
-        url = str(request.url)
-        client_host = request.client.host if request.client else "unknown"
-        user_agent = request.headers.get("user-agent", "unknown")
+def request_user_id(scope: Scope):
+    # Sólo lo que AuthMiddleware ya resolvió; el log nunca dispara una resolución de identidad
+    state = scope.get("state", {})
+    payload = state.get("token_payload") or {}
+    if "uid" in payload:
+        return payload["uid"]
+    user = state.get("user")
+    return user.id if user else None
 
-        logging.info(f"📥 {method} {url} - IP: {client_host} - UA: {user_agent}")
 
-        # Ejecutar la siguiente capa del middleware
-        response = await call_next(request)
+class LoggerMiddleware:
+    """Access log estructurado: un registro JSON por request, con muestreo de los 2xx."""
 
-        process_time = (time.perf_counter() - start_time) * 1000
-        status_code = response.status_code
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.sample_rate = settings.ACCESS_LOG_SAMPLE_RATE_2XX
+        self.slow_ms = settings.ACCESS_LOG_SLOW_MS
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Las stats de SQL se llevan siempre (alimentan el aviso de N+1), haya access log o no
+        stats = start_request_stats()
+        if not access_logger.isEnabledFor(logging.INFO):
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                report_repeated_queries(stats, route_template(scope))
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
 
-        # Colores para códigos HTTP
-        status_color = (
-            "\033[92m" if 200 <= status_code < 300 else  # Verde
-            "\033[93m" if 300 <= status_code < 400 else  # Amarillo
-            "\033[91m"                                   # Rojo
-        )
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
 
-        logging.info(
-            f"📤 {status_color}{status_code}\033[0m "
-            f"({process_time:.2f} ms)"
-        )
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            report_repeated_queries(stats, route_template(scope))
+            duration_ms = (time.perf_counter() - start_time) * 1000
+            if self._should_log(status_code, duration_ms):
+                client = scope.get("client")
+                access_logger.info("request", extra={"fields": {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route_template(scope),
+                    "status": status_code,
+                    "duration_ms": round(duration_ms, 2),
+                    "user_id": request_user_id(scope),
+                    "db_queries": stats.db_queries,
+                    "db_time_ms": round(stats.db_time * 1000, 2),
+                    "client_ip": client[0] if client else None,
+                }})
 
-        return response
+    def _should_log(self, status_code: int, duration_ms: float) -> bool:
+        # Errores, redirecciones y requests lentos siempre; los 2xx rápidos según la tasa
+        if not 200 <= status_code < 300 or duration_ms >= self.slow_ms:
+            return True
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
@@ -0,0 +1,52 @@
+import asyncio
+import logging
+import random
+import secrets
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.config import get_settings
+from app.core.profiling import ProfilingSession
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile-token"
+
+
+class ProfilingMiddleware:
+    """
+    Perfila requests puntuales: los que traen X-Profile-Token == PROFILE_ADMIN_TOKEN
+    o una fracción PROFILE_SAMPLE_RATE al azar. Sólo se registra si alguno está activo.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.token = settings.PROFILE_ADMIN_TOKEN.encode()
+        self.sample_rate = settings.PROFILE_SAMPLE_RATE
+        self.interval = settings.PROFILE_INTERVAL_MS / 1000
+        self.directory = settings.PROFILE_DIR
+        self.output_format = settings.PROFILE_FORMAT
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfilingSession(f"{scope['method']} {scope['path']}", self.interval)
+        session.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            session.stop()
+            path = await asyncio.get_running_loop().run_in_executor(
+                None, session.write, self.directory, self.output_format
+            )
+            logger.info("Perfil de %s %s guardado en %s (%.0f ms muestreados)",
+                        scope["method"], scope["path"], path, sum(session.samples.values()) * 1000)
+
+    def _should_profile(self, scope: Scope) -> bool:
+        if self.token:
+            # Bytes crudos del header: compare_digest con str falla (500) ante caracteres no ASCII
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER and secrets.compare_digest(value, self.token):
+                    return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
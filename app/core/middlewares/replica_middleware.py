@@ -0,0 +1,56 @@
+import time
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import get_settings
+from app.core.context import get_request_stats, pin_reads_to_primary
+
+settings = get_settings()
+
+PRIMARY_READS_COOKIE = "db_primary_until"
+
+
+class ReadYourWritesMiddleware:
+    """
+    Tras un request que escribió en la BD, las lecturas de ese navegador van al
+    primario durante DB_REPLICA_READ_YOUR_WRITES_SECONDS (cookie), así no ve datos
+    previos a su propio cambio mientras las réplicas se ponen al día.
+    Sólo se registra con réplicas configuradas; debe ir dentro de LoggerMiddleware,
+    que inicia las stats del request.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.window = settings.DB_REPLICA_READ_YOUR_WRITES_SECONDS
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            pin_reads_to_primary(float(Request(scope).cookies.get(PRIMARY_READS_COOKIE, 0)))
+        except ValueError:
+            pass
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                stats = get_request_stats()
+                if stats is not None and stats.db_writes:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("set-cookie", self._primary_reads_cookie())
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _primary_reads_cookie(self) -> str:
+        cookie = Response()
+        cookie.set_cookie(
+            key=PRIMARY_READS_COOKIE,
+            value=str(int(time.time() + self.window) + 1),
+            max_age=int(self.window) + 1,
+            httponly=True,
+            samesite="lax",
+        )
+        return cookie.headers["set-cookie"]
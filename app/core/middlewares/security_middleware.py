@@ -1,108 +1,144 @@
-from fastapi import Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
-from app.core.security import get_current_user_optional
-from starlette.responses import Response
-from starlette.types import ASGIApp, Receive, Scope, Send
+import logging
+import re
+import secrets
+from fastapi import HTTPException
 from starlette.requests import Request
-from typing import Callable
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.security import get_request_user_id
 from app.core.security import log_security_event
+from app.core.presentation.error_handlers import ErrorHandler
+from app.core.config import get_settings
+from app.utils.constants import CSP_CHECKOUT, CSP_DEFAULT, CSP_DOCS
+from app.services.routing.route_guard_service import RouteGuard
+
+logger = logging.getLogger(__name__)
 
 SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
-EXEMPT_PATHS = [
-    "/payments/paid",   # Izipay success return
-    "/payments/ipn",    # Izipay webhook 
-    "/consents",    # Izipay webhook 
-]
 
-class CSRFMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        path = request.url.path
+class CSRFMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        # Si es un método seguro o una ruta exenta, dejar pasar
-        if request.method in SAFE_METHODS or path in EXEMPT_PATHS:
-            return await call_next(request)
+        path = scope["path"]
+
+        # Si es un método seguro o una ruta exenta (ver ROUTE_POLICY_TABLE), dejar pasar
+        if scope["method"] in SAFE_METHODS or RouteGuard.classify(path).csrf_exempt:
+            await self.app(scope, receive, send)
+            return
 
         # Si es método sensible, verificar CSRF sólo si hay usuario autenticado
-        user = get_current_user_optional(request)
-        if user:
+        # (la identidad queda en request.state para AuthMiddleware y las dependencias)
+        request = Request(scope)
+        user_id = get_request_user_id(request)
+        if user_id:
             token = request.headers.get("x-csrf-token")
             session_token = request.cookies.get("csrf_token")
-            print("TOKENS", token, session_token)
 
             if not token or not session_token or token != session_token:
-                print("CSRF FALLÓ", token, session_token)
-                await log_security_event(user.id, request.client.host, "csrf_failed", f"CSRF token inválido en {path}")
-
-                raise HTTPException(status_code=403, detail="CSRF token inválido o ausente")
-
-        return await call_next(request)
-
-
-class SecureHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        response = await call_next(request)
-        path = request.url.path
-
-        # Política CSP: checkout necesita más permisividad (Izipay)
-        if path.startswith("/payments/checkout"):
-            response.headers["Content-Security-Policy"] = (
-                        "default-src 'self'; "
-                        "script-src 'self' 'unsafe-inline' https://cdn.tailwindcss.com https://static.micuentaweb.pe https://secure.micuentaweb.pe https://h.online-metrix.net https://*.online-metrix.net; "
-                        "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com https://static.micuentaweb.pe https://cdn.jsdelivr.net; "
-                        "img-src 'self' data: https://img.icons8.com https://cdn.jsdelivr.net https://static.micuentaweb.pe https://h.online-metrix.net https://*.online-metrix.net; "
-                        "font-src 'self' https://fonts.gstatic.com; "
-                        "frame-src https://secure.micuentaweb.pe https://static.micuentaweb.pe https://h.online-metrix.net https://*.online-metrix.net; "
-                        "connect-src 'self' https://secure.micuentaweb.pe https://h.online-metrix.net https://*.online-metrix.net; "
-                        "object-src 'none';"
-                    )
-            response.headers["Permissions-Policy"] = "payment=(self https://secure.micuentaweb.pe)"
-        # === 2. Documentación (Swagger UI) ===
-        elif path.startswith("/docs") or path.startswith("/redoc"):
-            response.headers["Content-Security-Policy"] = (
-                "default-src 'self'; "
-                "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://cdn.jsdelivr.net; "
-                "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://fonts.googleapis.com; "
-                "img-src 'self' data: https://fastapi.tiangolo.com https://cdn.jsdelivr.net; "
-                "font-src 'self' https://fonts.gstatic.com; "
-                "object-src 'none';"
-            )
-
+                logger.debug("CSRF falló en %s: header=%s cookie=%s", path, bool(token), bool(session_token))
+                ip = request.client.host if request.client else "unknown"
+                await log_security_event(user_id, ip, "csrf_failed", f"CSRF token inválido en {path}")
+
+                exc = HTTPException(status_code=403, detail="CSRF token inválido o ausente")
+                response = await ErrorHandler.http_exception_handler(request, exc)
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
+
+
+NONCE_PLACEHOLDER = "{nonce}"
+HSTS_HEADER = (b"strict-transport-security", b"max-age=63072000; includeSubDomains; preload")
+COMMON_HEADERS = {
+    # Evitar sniffing de tipos MIME
+    "X-Content-Type-Options": "nosniff",
+    # Política de referer
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+}
+PERMISSIONS_POLICY = "accelerometer=(), camera=(), gyroscope=(), geolocation=(), microphone=(), payment=(), usb=()"
+
+
+class HeaderPolicy:
+    """
+    Headers de seguridad de una clase de ruta, precalculados como tuplas de bytes.
+    Sólo un CSP con {nonce} y CSP_NONCE_ENABLED se arma por response; sin el flag
+    se quita el 'nonce-{nonce}' y la política queda precalculada como las demás.
+    """
+
+    def __init__(self, csp: str, headers: dict[str, str], nonce_enabled: bool = False):
+        headers = {**COMMON_HEADERS, **headers}
+        self.uses_nonce = nonce_enabled and NONCE_PLACEHOLDER in csp
+        if self.uses_nonce:
+            self.csp_template = csp.encode("latin-1")
         else:
-            # Política CSP estricta para el resto del sitio
-            response.headers["Content-Security-Policy"] = (
-                "default-src 'self' https://www.google.com/recaptcha/; "
-                "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://cdn.twind.style/ https://cdn.tailwindcss.com https://www.google.com/recaptcha/ https://www.gstatic.com/recaptcha/ https://www.gstatic.com/recaptcha/; "
-                "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://fonts.googleapis.com; "
-                "img-src 'self' data: https://img.icons8.com https://cdn.jsdelivr.net; "
-                "font-src 'self' https://fonts.gstatic.com; "
-                "object-src 'none';"
-            )
-            # COOP / COEP para aislamiento de origen ===
-            response.headers["Cross-Origin-Opener-Policy"] = "same-origin"
-            response.headers["Cross-Origin-Embedder-Policy"] = "same-origin"
-
-        # Seguridad HTTPS
-        if request.url.scheme == "https":
-            response.headers["Strict-Transport-Security"] = "max-age=63072000; includeSubDomains; preload"
-
-        # Evitar sniffing de tipos MIME
-        response.headers["X-Content-Type-Options"] = "nosniff"
+            headers["Content-Security-Policy"] = re.sub(r"\s*'nonce-\{nonce\}'", "", csp)
 
-        # Protección contra clickjacking
-        response.headers["X-Frame-Options"] = (
-            "ALLOW-FROM https://secure.micuentaweb.pe"
-            if path.startswith("/payments/checkout") else
-            "DENY"
+        self.raw_http = tuple(
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in headers.items()
         )
-
-        # Política de referer
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-
-        # Nueva: Permissions Policy
-        response.headers["Permissions-Policy"] = (
-            "accelerometer=(), camera=(), gyroscope=(), geolocation=(), microphone=(), payment=(), usb=()"
-        )
-
-
-
-        return response
\ No newline at end of file
+        # Seguridad HTTPS
+        self.raw_https = self.raw_http + (HSTS_HEADER,)
+
+    def render(self, scheme: str, nonce: str | None = None) -> tuple:
+        raw = self.raw_https if scheme == "https" else self.raw_http
+        if not self.uses_nonce:
+            return raw
+        csp = self.csp_template.replace(b"{nonce}", nonce.encode("latin-1"))
+        return raw + ((b"content-security-policy", csp),)
+
+
+def build_header_policies(settings) -> dict[str, HeaderPolicy]:
+    nonce_enabled = settings.CSP_NONCE_ENABLED
+    return {
+        # Checkout necesita más permisividad (Izipay)
+        "checkout": HeaderPolicy(settings.CSP_CHECKOUT or CSP_CHECKOUT, {
+            "X-Frame-Options": "ALLOW-FROM https://secure.micuentaweb.pe",
+            "Permissions-Policy": PERMISSIONS_POLICY.replace(
+                "payment=()", "payment=(self https://secure.micuentaweb.pe)"
+            ),
+        }, nonce_enabled),
+        # Documentación (Swagger UI)
+        "docs": HeaderPolicy(settings.CSP_DOCS or CSP_DOCS, {
+            "X-Frame-Options": "DENY",
+            "Permissions-Policy": PERMISSIONS_POLICY,
+        }, nonce_enabled),
+        # Política estricta para el resto del sitio, con COOP / COEP para aislamiento de origen
+        "default": HeaderPolicy(settings.CSP_DEFAULT or CSP_DEFAULT, {
+            "Cross-Origin-Opener-Policy": "same-origin",
+            "Cross-Origin-Embedder-Policy": "same-origin",
+            "X-Frame-Options": "DENY",
+            "Permissions-Policy": PERMISSIONS_POLICY,
+        }, nonce_enabled),
+    }
+
+
+class SecureHeadersMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.policies = build_header_policies(get_settings())
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        policy = self.policies[RouteGuard.classify(scope["path"]).header_policy]
+        nonce = None
+        if policy.uses_nonce:
+            # Disponible en templates como request.state.csp_nonce
+            nonce = secrets.token_urlsafe(16)
+            scope.setdefault("state", {})["csp_nonce"] = nonce
+        security_headers = policy.render(scope["scheme"], nonce)
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *security_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,4 +1,4 @@
-import traceback
+import logging
 from fastapi import Request, FastAPI
 from fastapi.responses import JSONResponse
 from fastapi.exception_handlers import http_exception_handler
@@ -8,6 +8,7 @@ from app.core.presentation.templates import templates
 import os
 
 IS_PRODUCTION = os.getenv("ENVIRONMENT") == "production"
+logger = logging.getLogger(__name__)
 
 
 class ErrorHandler:
@@ -35,8 +36,7 @@ class ErrorHandler:
 
     @staticmethod
     async def internal_exception_handler(request: Request, exc: Exception):
-        if not IS_PRODUCTION:
-            print("Error interno:", traceback.format_exc())
+        logger.error("Error interno en %s %s", request.method, request.url.path, exc_info=exc)
 
         return templates.TemplateResponse(
             "errors/500.html", {"request": request}, status_code=500
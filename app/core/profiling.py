@@ -0,0 +1,163 @@
+"""
+Profiler por muestreo para requests individuales (opt-in, ver ProfilingMiddleware).
+
+Un hilo toma la pila de los hilos relevantes cada PROFILE_INTERVAL_MS:
+  - el hilo del event loop, sólo mientras la task en curso es la del request
+    (middlewares, dependencias async, handlers async, render de Jinja)
+  - los hilos del threadpool de anyio que ejecutan trabajo del request
+    (handlers y dependencias sync, SQLAlchemy): se reconocen por el
+    contextvars.Context que anyio copia al hilo, que contiene la sesión activa
+
+Como todo profiler en proceso, el hilo muestreador necesita el GIL: en código que
+lo suelta seguido (queries, I/O) las muestras tienden a caer en esos puntos.
+Para perfiles de CPU puro conviene complementar con py-spy.
+"""
+import asyncio
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+_active_session = contextvars.ContextVar("profiling_session", default=None)
+
+LOOP_ROOT = "[event loop]"
+WORKER_ROOT = "[threadpool]"
+IDLE_WORKER_MODULES = (os.sep + "queue.py", os.sep + "base_events.py")
+
+
+def _frame_label(code) -> tuple[str, str, int]:
+    filename = code.co_filename
+    for marker in ("site-packages" + os.sep, "app" + os.sep):
+        index = filename.rfind(marker)
+        if index != -1:
+            filename = filename[index + len(marker):] if marker.startswith("site") else filename[index:]
+            break
+    return code.co_name, filename, code.co_firstlineno
+
+
+class ProfilingSession:
+    def __init__(self, name: str, interval: float):
+        self.name = name
+        self.interval = interval
+        self.samples: Counter = Counter()  # pila -> segundos
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id = 0
+        self._context_token = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        self._loop_thread_id = threading.get_ident()
+        self._context_token = _active_session.set(self)
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.duration = time.perf_counter() - self.started_at
+        self._stop.set()
+        self._thread.join()
+        _active_session.reset(self._context_token)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            # Cada muestra pesa el tiempo real desde la anterior: con el GIL ocupado el
+            # hilo despierta tarde, y pesar por el intervalo nominal subestimaría el total
+            now = time.perf_counter()
+            weight, last = now - last, now
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if thread_id == self._loop_thread_id:
+                    if asyncio.current_task(self._loop) is self._task:
+                        self._record(LOOP_ROOT, frame, weight)
+                elif self._runs_for_request(frame):
+                    self._record(WORKER_ROOT, frame, weight)
+
+    def _runs_for_request(self, frame) -> bool:
+        # WorkerThread.run de anyio ejecuta context.run(func): ese Context es el del request.
+        # El local `context` sobrevive al item, así que un worker ocioso (esperando en
+        # queue.get) o reportando el resultado al loop no cuenta
+        child = None
+        while frame is not None:
+            if frame.f_code.co_name == "run" and "anyio" in frame.f_code.co_filename:
+                if child is None or child.f_code.co_filename.endswith(IDLE_WORKER_MODULES):
+                    return False
+                context = frame.f_locals.get("context")
+                return isinstance(context, contextvars.Context) and context.get(_active_session) is self
+            child, frame = frame, frame.f_back
+        return False
+
+    def _record(self, root: str, frame, weight: float):
+        stack = []
+        while frame is not None:
+            stack.append(_frame_label(frame.f_code))
+            frame = frame.f_back
+        stack.append((root, "", 0))
+        stack.reverse()
+        self.samples[tuple(stack)] += weight
+
+    def collapsed(self) -> str:
+        """Formato "collapsed stacks" (flamegraph.pl, speedscope, inferno); el conteo va en ms."""
+        lines = []
+        for stack, seconds in self.samples.most_common():
+            frames = ";".join(f"{name} ({filename}:{line})" if filename else name for name, filename, line in stack)
+            lines.append(f"{frames} {max(1, round(seconds * 1000))}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self) -> str:
+        frames, index = [], {}
+        samples, weights = [], []
+        for stack, seconds in self.samples.items():
+            sample = []
+            for name, filename, line in stack:
+                key = (name, filename, line)
+                if key not in index:
+                    index[key] = len(frames)
+                    frames.append({"name": name, "file": filename, "line": line} if filename else {"name": name})
+                sample.append(index[key])
+            samples.append(sample)
+            weights.append(round(seconds * 1000, 3))
+
+        return json.dumps({
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.name,
+            "activeProfileIndex": 0,
+            "exporter": "app.core.profiling",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": self.name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(self.duration * 1000, 3),
+                "samples": samples,
+                "weights": weights,
+            }],
+        })
+
+    def write(self, directory: str, output_format: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in self.name).strip("_")
+        stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{int(time.time() * 1000) % 1000:03d}"
+        duration_ms = int(self.duration * 1000)
+        if output_format == "collapsed":
+            filename, content = f"{stamp}-{safe_name}-{duration_ms}ms.collapsed.txt", self.collapsed()
+        else:
+            filename, content = f"{stamp}-{safe_name}-{duration_ms}ms.speedscope.json", self.speedscope()
+
+        path = os.path.join(directory, filename)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
@@ -0,0 +1,127 @@
+"""
+Chequeo de planes de las consultas calientes: cada una debe resolverse con un
+índice, no recorriendo la tabla entera.
+
+    python -m app.core.query_plans            # esquema de los modelos en SQLite en memoria
+    python -m app.core.query_plans --url "$DATABASE_URL"
+
+En PostgreSQL se corre con enable_seqscan=off: el planner sólo elige un Seq Scan
+si no tiene un índice utilizable, así el resultado no depende del tamaño de la tabla.
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, delete, func, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from app.models.models import ConsentLog, Item, Order, OrderStatus, SecurityLog
+
+
+class explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(explain)
+def _compile_explain(element, compiler, **kw):
+    prefix = "EXPLAIN QUERY PLAN " if compiler.dialect.name == "sqlite" else "EXPLAIN "
+    return prefix + compiler.process(element.statement, **kw)
+
+
+def hot_queries() -> dict:
+    cutoff = datetime.utcnow() - timedelta(hours=1)
+    return {
+        "checkout: orden pendiente": (
+            select(Order)
+            .where(Order.user_id == 1, Order.plan_id == 1, Order.status == OrderStatus.PENDING)
+            .order_by(Order.id.desc())
+            .limit(1)
+        ),
+        "dashboard_orders": select(Order).where(Order.user_id == 1).order_by(Order.id.desc()).limit(20),
+        "dashboard: conteo de órdenes": select(func.count()).select_from(Order).where(Order.user_id == 1),
+        "items del usuario": select(Item).where(Item.owner_id == 1),
+        "dashboard: conteo de items": select(func.count()).select_from(Item).where(Item.owner_id == 1),
+        "dashboard_items_page": select(Item).where(Item.created_by == 1),
+        "security_logs recientes": select(SecurityLog).where(SecurityLog.created_at >= cutoff),
+        "consentimientos del usuario": (
+            select(ConsentLog).where(ConsentLog.user_id == 1, ConsentLog.policy_type == "privacy")
+        ),
+        "cleanup_pending_orders": (
+            delete(Order).where(Order.status == OrderStatus.PENDING, Order.created_at < cutoff)
+        ),
+    }
+
+
+def full_scans(plan: list[str]) -> list[str]:
+    """Líneas del plan que recorren una tabla completa."""
+    scans = []
+    for line in plan:
+        # SQLite: "SCAN orders" (sin índice) vs "SEARCH orders USING INDEX ..."
+        if line.startswith("SCAN ") and " USING " not in line:
+            scans.append(line)
+        elif "Seq Scan on " in line:
+            scans.append(line.strip())
+    return scans
+
+
+def query_plan(conn, statement) -> list[str]:
+    rows = conn.execute(explain(statement)).fetchall()
+    if conn.dialect.name == "sqlite":
+        # (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    return [row[0] for row in rows]
+
+
+def check_query_plans(engine: Engine) -> dict[str, list[str]]:
+    """Nombre de la consulta -> líneas con scans completos (vacío si todas usan índice)."""
+    problems = {}
+    with engine.connect() as conn:
+        # EXPLAIN sin ANALYZE no ejecuta nada, pero por las dudas nada queda confirmado
+        with conn.begin() as transaction:
+            if conn.dialect.name == "postgresql":
+                conn.execute(text("SET LOCAL enable_seqscan = off"))
+            for name, statement in hot_queries().items():
+                scans = full_scans(query_plan(conn, statement))
+                if scans:
+                    problems[name] = scans
+            transaction.rollback()
+    return problems
+
+
+def assert_hot_queries_indexed(engine: Engine):
+    """Para tests: falla si alguna consulta caliente volvió a un scan secuencial."""
+    problems = check_query_plans(engine)
+    if problems:
+        listing = "\n".join(f"  {name}: {'; '.join(scans)}" for name, scans in problems.items())
+        raise AssertionError(f"Consultas calientes sin índice:\n{listing}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="BD a revisar (por defecto: el esquema de los modelos en SQLite en memoria)")
+    args = parser.parse_args()
+
+    if args.url:
+        engine = create_engine(args.url)
+    else:
+        from app.core.database import Base
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+
+    try:
+        assert_hot_queries_indexed(engine)
+    except AssertionError as exc:
+        print(exc)
+        return 1
+    finally:
+        engine.dispose()
+
+    print(f"OK: {len(hot_queries())} consultas calientes usan índices")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
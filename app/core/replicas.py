@@ -0,0 +1,62 @@
+import asyncio
+import itertools
+import logging
+import time
+from sqlalchemy import event, exc, text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaSet:
+    """
+    Réplicas de lectura en round-robin. Una réplica que da error de conexión sale de
+    la rotación por `retry_seconds` (o hasta que el chequeo periódico la vea sana);
+    sin réplicas disponibles, pick() devuelve None y se lee del primario.
+    """
+
+    def __init__(self, engines: list[Engine], retry_seconds: float):
+        self.engines = engines
+        self.retry_seconds = retry_seconds
+        self._down_until: dict[Engine, float] = {}
+        self._next = itertools.count()
+        for engine in engines:
+            event.listen(engine, "handle_error", self._on_error)
+
+    def pick(self) -> Engine | None:
+        now = time.monotonic()
+        for _ in range(len(self.engines)):
+            engine = self.engines[next(self._next) % len(self.engines)]
+            if self._down_until.get(engine, 0.0) <= now:
+                return engine
+        return None
+
+    def mark_down(self, engine: Engine):
+        if engine not in self._down_until:
+            logger.warning("Réplica %s fuera de rotación", engine.url.render_as_string(hide_password=True))
+        self._down_until[engine] = time.monotonic() + self.retry_seconds
+
+    def mark_up(self, engine: Engine):
+        if self._down_until.pop(engine, None) is not None:
+            logger.info("Réplica %s de vuelta en rotación", engine.url.render_as_string(hide_password=True))
+
+    def _on_error(self, context):
+        # Errores de conexión (caída, failover, red), no errores del SQL en sí
+        if context.is_disconnect or isinstance(context.sqlalchemy_exception, exc.OperationalError):
+            self.mark_down(context.engine)
+
+    def check(self):
+        for engine in self.engines:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+            except exc.SQLAlchemyError:
+                self.mark_down(engine)
+            else:
+                self.mark_up(engine)
+
+    async def health_loop(self, interval: float):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            await loop.run_in_executor(None, self.check)
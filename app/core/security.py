@@ -1,12 +1,16 @@
+from datetime import datetime
 from typing import Optional
 from fastapi import HTTPException, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.core.config import get_settings
-from app.core.database import SessionLocal, get_db
+from app.core.database import SessionLocal, get_async_db, get_db
+from app.core.context import set_current_user_id, set_request_user
 from app.models.models import User
 from app.services.auth.token_service import TokenService
 from app.services.users.user_service import UserService
-from app.core.database import SessionLocal
+from app.core.batch_writer import BatchWriter
 from app.models.models import SecurityLog
 from fastapi import Depends, HTTPException
 from sqlalchemy.orm import Session
@@ -24,67 +28,108 @@ ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 REFRESH_TOKEN_EXPIRE_DAYS = settings.REFRESH_TOKEN_EXPIRE_DAYS
 
-def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
-    token = request.cookies.get("access_token")
-    refresh_token = request.cookies.get("refresh_token")
-    email = None
+# Eventos de seguridad en write-behind: una ráfaga (credential stuffing) no genera un commit por evento
+security_log_writer = BatchWriter(
+    SecurityLog,
+    batch_size=settings.SECURITY_LOG_BATCH_SIZE,
+    flush_interval=settings.SECURITY_LOG_FLUSH_SECONDS,
+    max_pending=settings.SECURITY_LOG_MAX_PENDING,
+    overflow=settings.SECURITY_LOG_OVERFLOW,
+)
 
-    if token:
-        payload = TokenService.decode_token(token)
-        email = payload.get("sub") if payload else None
+def _extract_token(request: Request, cookie_name: str) -> Optional[str]:
+    token = request.cookies.get(cookie_name)
+    if token and token.startswith("Bearer "):
+        token = token.split(" ")[1]
+    return token
 
-    if not email and refresh_token:
-        payload = TokenService.decode_token_or_raise(refresh_token, token_type="refresh")
-        email = payload.get("sub")
+def _resolve_token_payload(request: Request) -> Optional[dict]:
+    # Un único decode del access token por request
+    state = request.state
+    if not getattr(state, "token_resolved", False):
+        state.token_payload = TokenService.decode_token(_extract_token(request, "access_token"))
+        state.token_resolved = True
+    return state.token_payload
 
-    if not email:
-        raise HTTPException(status_code=401, detail="Token no válido o expirado")
+def get_request_claims(request: Request) -> Optional[dict]:
+    """Claims de plan del access token (modo AUTH_STATELESS_CLAIMS), sin tocar la BD."""
+    payload = _resolve_token_payload(request)
+    if not TokenService.has_entitlement_claims(payload):
+        return None
+    set_current_user_id(payload["uid"])
+    return payload
 
-    user = UserService.get_by_email(db, email)
-    if not user:
-        raise HTTPException(status_code=401, detail="Usuario no encontrado")
+def resolve_request_user(request: Request) -> Optional[User]:
+    """
+    Resuelve el usuario autenticado una sola vez por request: un decode del JWT y
+    como máximo una consulta. El resultado queda en request.state y en el contextvar
+    para que middlewares y dependencias posteriores lo reutilicen.
+    """
+    state = request.state
+    if getattr(state, "identity_resolved", False):
+        return state.user
+
+    user = None
+    payload = _resolve_token_payload(request)
+    if TokenService.has_entitlement_claims(payload):
+        user = UserService.get_user_by_id(payload["uid"])
+    elif payload and payload.get("sub"):
+        user = UserService.get_user_by_email(payload["sub"])
 
+    # Si no hay access_token válido pero sí refresh, renovar
+    refresh_token = request.cookies.get("refresh_token")
+    if not user and refresh_token and not request.url.path.startswith("/auth/logout"):
+        refresh_payload = TokenService.decode_token(refresh_token)
+        email = refresh_payload.get("sub") if refresh_payload else None
+        if email:
+            user = UserService.get_user_by_email(email)
+            if user:
+                state.renewed_token = TokenService.create_access_token({"sub": email}, user=user)
+
+    state.user = user
+    state.identity_resolved = True
+    set_request_user(user)
     return user
 
-def get_current_user_optional(request: Request) -> Optional[User]:
-    token = request.cookies.get("access_token")
-    if not token:
-        return None
+def get_request_user_id(request: Request) -> Optional[int]:
+    # Con claims stateless basta el uid del token; si no, se resuelve el usuario
+    claims = get_request_claims(request)
+    if claims:
+        return claims["uid"]
+    user = resolve_request_user(request)
+    return user.id if user else None
 
-    if token.startswith("Bearer "):
-        token = token.split(" ")[1]
+def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
+    user = resolve_request_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Token no válido o expirado")
 
-    payload = TokenService.decode_token(token)
-    email = payload.get("sub") if payload else None
-    
-    if not email:
-        return None
+    # Adjuntar a la sesión del request sin volver a consultar la BD
+    return db.merge(user, load=False)
 
-    db = SessionLocal()
-    try:
-        user = UserService.get_by_email(db, email)
-        if user:
-            request.state.user = user
-        return user
-    finally:
-        db.close()
+async def get_current_user_async(request: Request, db: AsyncSession = Depends(get_async_db)) -> User:
+    # AuthMiddleware casi siempre dejó la identidad resuelta; si no (claims stateless),
+    # la posible consulta sync va al threadpool en vez de bloquear el event loop
+    if getattr(request.state, "identity_resolved", False):
+        user = request.state.user
+    else:
+        user = await run_in_threadpool(resolve_request_user, request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Token no válido o expirado")
+
+    return await db.merge(user, load=False)
+
+def get_current_user_optional(request: Request) -> Optional[User]:
+    return resolve_request_user(request)
 
 async def log_security_event(user_id, ip_address, event_type, description=None):
-    db = SessionLocal()
-    try:
-        log = SecurityLog(
-            user_id=user_id,
-            ip_address=ip_address,
-            event_type=event_type,
-            description=description
-        )
-        db.add(log)
-        db.commit()
-    except Exception:
-        db.rollback()
-        raise
-    finally:
-        db.close()
+    security_log_writer.add(
+        user_id=user_id,
+        ip_address=ip_address,
+        event_type=event_type,
+        description=description,
+        created_at=datetime.utcnow(),
+    )
 
 def ownership_dependency(model, id_param: str):
     def dependency(
@@ -97,3 +142,15 @@ def ownership_dependency(model, id_param: str):
             raise HTTPException(status_code=403, detail="No tienes acceso a este recurso.")
         return instance
     return dependency
+
+def ownership_dependency_async(model, id_param: str):
+    async def dependency(
+        id_value: int = Path(..., alias=id_param),
+        db: AsyncSession = Depends(get_async_db),
+        current_user: User = Depends(get_current_user_async)
+    ):
+        instance = await db.get(model, id_value)
+        if not instance or instance.owner_id != current_user.id:
+            raise HTTPException(status_code=403, detail="No tienes acceso a este recurso.")
+        return instance
+    return dependency
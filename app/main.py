@@ -1,17 +1,48 @@
+import asyncio
+import logging
+import anyio
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from app.core.security import limiter
-from app.core.database import Base, engine
-from app.core.hooks.audit import register_audit_listeners
+from app.core.security import limiter, security_log_writer
+from app.core.config import get_settings
+from app.core.database import (
+    DATABASE_LABEL,
+    Base,
+    all_engines,
+    async_engine,
+    async_writer_engine,
+    check_pool_capacity,
+    engine,
+    replica_set,
+    writer_engine,
+)
+from app.core.logging_config import setup_logging
+from app.core.metrics import mark_worker_dead, sample_resources
+from app.core.hooks.query_stats import register_query_counter
+from app.core.hooks.audit import (
+    register_audit_listeners,
+    register_plan_catalog_listeners,
+    register_user_cache_listeners,
+    register_user_summary_listeners,
+)
 from app.core.presentation.error_handlers import ErrorHandler
 from app.core.middlewares.auth_middleware import AuthMiddleware
 from app.core.middlewares.logging_middleware import LoggerMiddleware
+from app.core.middlewares.metrics_middleware import MetricsMiddleware
+from app.core.middlewares.profiling_middleware import ProfilingMiddleware
+from app.core.middlewares.replica_middleware import ReadYourWritesMiddleware
 from app.core.middlewares.security_middleware import CSRFMiddleware, SecureHeadersMiddleware
 from app.models.models import User, Item, Plan, Order
 from app.routes import auth, home, items, dashboard, mailing, payments, orders, settings, compliance
-from app.api import contact
-from app.seeders.seed_data import create_free_plan_if_not_exists
+from app.api import contact, metrics
+from app.services.auth.password_service import PasswordService
+from app.services.auth.recaptcha_service import recaptcha_verifier
+from app.services.payments.izipay_client import izipay_client
+from app.services.mailing.mail_outbox import mail_outbox
+from app.services.compliance.consent_service import consent_log_writer
+from app.seeders.seed_data import backfill_plan_expirations, backfill_user_summaries, create_free_plan_if_not_exists
 from fastapi.middleware.cors import CORSMiddleware  
 
 # Config
@@ -20,8 +51,58 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 STATIC_DIR = os.path.join(BASE_DIR, "public", "static")
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Clientes HTTP compartidos: se crean en el event loop del worker y se cierran al apagar
+    await recaptcha_verifier.start()
+    await izipay_client.start()
+    await mail_outbox.start()
+    await security_log_writer.start()
+    await consent_log_writer.start()
+    config = get_settings()
+    # Hilos para handlers y dependencias sync; cada uno puede retener una conexión de BD
+    thread_limiter = anyio.to_thread.current_default_thread_limiter()
+    if config.THREADPOOL_TOKENS:
+        thread_limiter.total_tokens = config.THREADPOOL_TOKENS
+    check_pool_capacity(thread_limiter.total_tokens)
+    pools = {"sync": engine.pool, "async": async_engine.sync_engine.pool}
+    if writer_engine is not None:
+        pools["sync-writer"] = writer_engine.pool
+        pools["async-writer"] = async_writer_engine.sync_engine.pool
+    for index, replica in enumerate(replica_set.engines):
+        pools[f"replica-{index}"] = replica.pool
+    sampler = asyncio.create_task(sample_resources(pools, config.METRICS_SAMPLE_SECONDS)) \
+        if config.METRICS_ENABLED else None
+    replica_health = asyncio.create_task(replica_set.health_loop(config.DB_REPLICA_HEALTH_CHECK_SECONDS)) \
+        if replica_set.engines else None
+    yield
+    if sampler:
+        sampler.cancel()
+    if replica_health:
+        replica_health.cancel()
+    # Drenar primero: el outbox puede seguir enviando mientras se cierran los demás
+    await mail_outbox.stop()
+    await security_log_writer.stop()
+    await consent_log_writer.stop()
+    await recaptcha_verifier.aclose()
+    await izipay_client.aclose()
+    await async_engine.dispose()
+    if async_writer_engine is not None:
+        await async_writer_engine.dispose()
+    PasswordService.shutdown()
+    mark_worker_dead()
+
+
+logger = logging.getLogger(__name__)
+
+
 def create_app() -> FastAPI:
+    # Logs vía cola: el I/O ocurre en el hilo del QueueListener, no en el event loop
+    setup_logging()
+    logger.info(DATABASE_LABEL)
+
     app = FastAPI(
+        lifespan=lifespan,
         docs_url=None if IS_PRODUCTION else "/docs",
         redoc_url=None if IS_PRODUCTION else "/redoc",
         openapi_url=None if IS_PRODUCTION else "/openapi.json"
@@ -32,6 +113,14 @@ def create_app() -> FastAPI:
     # DB y auditoría
     Base.metadata.create_all(bind=engine)
     register_audit_listeners([User, Item, Plan, Order])
+    register_user_cache_listeners()
+    register_plan_catalog_listeners()
+    register_user_summary_listeners()
+    for db_engine in all_engines():
+        register_query_counter(db_engine)
+
+    # Costo de bcrypt (fijo o calibrado a PASSWORD_HASH_TARGET_MS)
+    PasswordService.configure_from_settings()
 
     # Static files
     app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
@@ -50,6 +139,8 @@ def create_app() -> FastAPI:
 
     # Seed
     create_free_plan_if_not_exists()
+    backfill_plan_expirations()
+    backfill_user_summaries()
 
     return app
 
@@ -64,8 +155,18 @@ def register_middlewares(app: FastAPI):
         allow_headers=["*"],
     )
     app.add_middleware(AuthMiddleware)
-    app.add_middleware(LoggerMiddleware)
+    # Entre Logger (que inicia las stats del request) y el resto: ve si el request escribió
+    if replica_set.engines:
+        app.add_middleware(ReadYourWritesMiddleware)
     app.add_middleware(CSRFMiddleware)
+    # Envuelve a CSRF: la consulta de identidad que hace CSRF entra en db_queries y en el reporte de N+1
+    app.add_middleware(LoggerMiddleware)
+    # El más externo: mide el request completo, incluidos los rechazos de CSRF
+    if get_settings().METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+    # Fuera de todo lo demás para que el perfil cubra todos los middlewares; sin activar no existe
+    if get_settings().PROFILE_ADMIN_TOKEN or get_settings().PROFILE_SAMPLE_RATE > 0:
+        app.add_middleware(ProfilingMiddleware)
 
 
 def register_routes(app: FastAPI):
@@ -82,6 +183,7 @@ def register_routes(app: FastAPI):
 
 def register_api(app: FastAPI):
     app.include_router(contact.router)
+    app.include_router(metrics.router)
 
 
 app = create_app()
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import JSON, Boolean, Column, DateTime, Integer, String, ForeignKey, Numeric, Enum
+from sqlalchemy import JSON, Boolean, Column, DateTime, Integer, String, Text, ForeignKey, Numeric, Enum, Index
 from sqlalchemy.orm import relationship
 from ..core.database import Base
 from .audit_mixin import AuditMixin
@@ -24,11 +24,17 @@ class User(Base, AuditMixin):
 
     plan_id = Column(Integer, ForeignKey("plans.id"), nullable=True)
     plan_assigned_at = Column(DateTime, nullable=True)
+    # Desnormalizado: plan_assigned_at + plan.validity_days (ver PlanService.assign_plan)
+    plan_expires_at = Column(DateTime, nullable=True, index=True)
 
     plan = relationship("Plan")
 
 class Item(Base, AuditMixin):
     __tablename__ = "items"
+    __table_args__ = (
+        Index("ix_items_owner_id", "owner_id"),
+        Index("ix_items_created_by", "created_by"),  # dashboard_items_page
+    )
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
     owner_id = Column(Integer, ForeignKey("users.id"))
@@ -56,6 +62,12 @@ class OrderStatus(str, enum.Enum):
 
 class Order(Base, AuditMixin):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Orden pendiente del checkout y listado del dashboard (user_id + status, id desc)
+        Index("ix_orders_user_status_id", "user_id", "status", "id"),
+        # cleanup_pending_orders
+        Index("ix_orders_status_created_at", "status", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -63,12 +75,36 @@ class Order(Base, AuditMixin):
     status = Column(Enum(OrderStatus), default=OrderStatus.PENDING, nullable=False)
     payment_reference = Column(String(100), nullable=True)
 
+    # formToken de Izipay reutilizable mientras no expire y el monto (en céntimos) no cambie
+    form_token = Column(String(512), nullable=True)
+    form_token_expires_at = Column(DateTime, nullable=True)
+    form_token_amount = Column(Integer, nullable=True)
+
     # Relaciones
     user = relationship("User", back_populates="orders")
     plan = relationship("Plan")
 
+class UserSummary(Base):
+    """
+    Contadores del dashboard por usuario, mantenidos en el flush por los listeners
+    de app/core/hooks/audit.py (ver UserSummaryService). Reconstruible con
+    `python -m app.services.users.user_summary_service`.
+    """
+    __tablename__ = "user_summaries"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    item_count = Column(Integer, nullable=False, default=0)
+    order_count = Column(Integer, nullable=False, default=0)
+    pending_orders = Column(Integer, nullable=False, default=0)
+    paid_orders = Column(Integer, nullable=False, default=0)
+    canceled_orders = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=True)
+
 class ConsentLog(Base):
     __tablename__ = "consent_logs"
+    __table_args__ = (
+        Index("ix_consent_logs_user_policy", "user_id", "policy_type"),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -83,6 +119,9 @@ class ConsentLog(Base):
 
 class SecurityLog(Base, AuditMixin):
     __tablename__ = "security_logs"
+    __table_args__ = (
+        Index("ix_security_logs_created_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)   
@@ -90,4 +129,18 @@ class SecurityLog(Base, AuditMixin):
     event_type = Column(String(50), nullable=False)   
     description = Column(String(255), nullable=True)   
 
-    user = relationship("User", backref="security_logs")
\ No newline at end of file
+    user = relationship("User", backref="security_logs")
+
+
+class FailedMail(Base):
+    """Correos que el outbox no pudo entregar (reintentos agotados o pendientes al apagar)."""
+    __tablename__ = "failed_mails"
+
+    id = Column(Integer, primary_key=True)
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    html = Column(Boolean, nullable=False, default=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String(500), nullable=True)
+    failed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
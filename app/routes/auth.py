@@ -1,3 +1,4 @@
+import logging
 from typing import Optional
 from fastapi import APIRouter, Depends, Form, HTTPException, Request
 from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
@@ -6,21 +7,27 @@ from app.core.security import (
     ALGORITHM,
     SECRET_KEY 
 )
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
 from app.core.security import log_security_event
-from app.models.models import User, Plan, ConsentLog
+from app.models.models import User, Plan
 from datetime import datetime
 from app.core.config import get_settings
 from app.services.auth.password_service import PasswordService
 from app.services.auth.token_service import TokenService
+from app.services.compliance.consent_service import ConsentService
+from app.services.users.user_service import UserService
+from app.services.plans.plan_catalog import plan_catalog
+from app.services.plans.plan_service import PlanService
 from app.core.security import limiter 
 from app.utils.auth_utils import is_user_blocked, register_failed_attempt, reset_attempts, validate_password_strength
-from app.utils.constants import DPA_DESCRIPTION, MARKETING_DESCRIPTION
 from app.utils.recaptcha_util import verify_recaptcha
 from app.core.presentation.templates import render_template
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -35,10 +42,10 @@ async def login_action(
     request: Request,
     email: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     g_recaptcha_response: str = Form(...)
 ):
-    print("Token recibido:", g_recaptcha_response)
+    logger.debug("Token reCAPTCHA recibido (%s caracteres)", len(g_recaptcha_response))
 
     if not await verify_recaptcha(g_recaptcha_response, "login"):
         await log_security_event(None, request.client.host, "recaptcha_failed", "Fallo en reCAPTCHA durante login")
@@ -47,7 +54,7 @@ async def login_action(
     
     # Busca usuario en BD
 
-    user = db.query(User).filter(User.email == email).first()
+    user = (await db.execute(select(User).where(User.email == email))).scalars().first()
 
     # Si existe y está bloqueado -> mensaje con tiempo restante
     if user and is_user_blocked(user):
@@ -58,11 +65,16 @@ async def login_action(
             {"error": f"Cuenta bloqueada temporalmente. Intenta en {minutos_restantes} minutos."}
         )
 
-    # Verificar existencia y contraseña
-    if not user or not PasswordService.verify_password(password, user.hashed_password):
+    # Verificar existencia y contraseña (bcrypt corre fuera del event loop)
+    if user:
+        is_valid, new_hash = await PasswordService.verify_and_update_async(password, user.hashed_password)
+    else:
+        is_valid, new_hash = False, None
+
+    if not is_valid:
         # Si existe, registra intento en BD
         if user:
-            register_failed_attempt(db, user)
+            await register_failed_attempt(db, user)
             
         await log_security_event(user.id if user else None, request.client.host, "login_failed", f"Intento fallido para email: {email}")
    
@@ -73,10 +85,13 @@ async def login_action(
             {"error": "Credenciales inválidas"}
         )
 
-    # Login correcto: resetear intentos y crear tokens
-    reset_attempts(db, user)
+    # Login correcto: re-hashear si el costo guardado difiere del actual,
+    # resetear intentos (persiste ambos) y crear tokens
+    if new_hash:
+        user.hashed_password = new_hash
+    await reset_attempts(db, user)
 
-    token = TokenService.create_access_token({"sub": user.email})
+    token = TokenService.create_access_token({"sub": user.email}, user=user)
     refresh_token = TokenService.create_refresh_token({"sub": user.email})
     response = RedirectResponse(url="/dashboard", status_code=302)
     response.set_cookie(key="access_token", value=token, httponly=True, max_age=3600)
@@ -117,33 +132,21 @@ async def register_action(
     job_title: str = Form(None),
     accept_dpa: bool = Form(...),   
     accept_marketing: Optional[str] = Form(None),  
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     g_recaptcha_response_register: str = Form(...),
 ):
-    print("Token recibido:", g_recaptcha_response_register)
+    logger.debug("Token reCAPTCHA recibido (%s caracteres)", len(g_recaptcha_response_register))
 
     if not await verify_recaptcha(g_recaptcha_response_register, "register"):
         raise HTTPException(status_code=400, detail="Fallo en reCAPTCHA")
 
-    existing_user = db.query(User).filter(User.email == email).first()
-    if existing_user:
-        return render_template(
-            request,
-            "auth/register.html",
-            {"error": "El correo ya está registrado"}
-        )
-
-    existing_user = db.query(User).filter(User.email == email).first()
-    if existing_user:
-        return render_template(
-            request,
-            "auth/register.html",
-            {"error": "El correo ya está registrado"}
-        )
-    
+    # Validaciones baratas primero; una sola consulta de existencia
     validate_password_strength(password)
 
-    hashed_password = PasswordService.hash_password(password)
+    if await UserService.get_by_email(db, email):
+        return _email_taken(request)
+
+    hashed_password = await PasswordService.hash_password_async(password)
     new_user = User(
         email=email,
         full_name=full_name,
@@ -154,43 +157,23 @@ async def register_action(
         hashed_password=hashed_password,
     )
 
-        # 🔓 Asignar plan gratuito si está habilitado en el entorno
+    # 🔓 Asignar plan gratuito si está habilitado en el entorno
     if settings.HAS_FREE_DEMO and settings.FREE_PLAN_NAME:
-        free_plan = db.query(Plan).filter_by(name=settings.FREE_PLAN_NAME, is_free=True).first()
-        if free_plan:
-            new_user.plan = free_plan
-            new_user.plan_assigned_at = datetime.utcnow()
-            
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-
-    # Guardar consentimiento obligatorio (DPA + Términos)
-    dpa_consent = ConsentLog(
-        user_id=new_user.id,
-        policy_type="dpa_terms",
-        version="1.0",   
-        description=DPA_DESCRIPTION.strip(),
-        accepted=True,
-        ip_address=request.client.host
-    )
-    db.add(dpa_consent)
-
-    # Guardar consentimiento opcional (marketing)
-    if accept_marketing:
-        marketing_consent = ConsentLog(
-            user_id=new_user.id,
-            policy_type="marketing",
-            version="1.0",
-            description=MARKETING_DESCRIPTION.strip(),
-            accepted=True,
-            ip_address=request.client.host
-        )
-        db.add(marketing_consent)
+        free_plan = plan_catalog.get_by_name(settings.FREE_PLAN_NAME)
+        if free_plan and free_plan.is_free:
+            PlanService.assign_plan(new_user, free_plan)
 
-    db.commit()
+    # Usuario y consentimientos (DPA + marketing opcional) en una sola transacción
+    db.add(new_user)
+    db.add_all(ConsentService.registration_consents(new_user, request.client.host, bool(accept_marketing)))
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Otro registro con el mismo email ganó la carrera entre la consulta y el commit
+        await db.rollback()
+        return _email_taken(request)
 
-    token = TokenService.create_access_token({"sub": new_user.email})
+    token = TokenService.create_access_token({"sub": new_user.email}, user=new_user)
     refresh_token = TokenService.create_refresh_token({"sub": new_user.email})
     response = RedirectResponse(url="/dashboard", status_code=302)
     response.set_cookie(key="access_token", value=token, httponly=True, max_age=3600)
@@ -198,10 +181,18 @@ async def register_action(
     return response
 
 
+def _email_taken(request: Request):
+    return render_template(
+        request,
+        "auth/register.html",
+        {"error": "El correo ya está registrado"}
+    )
+
+
 @router.post("/refresh")
 def refresh_access_token(request: Request):
     refresh_token = request.cookies.get("refresh_token")
-    print("REFRESH TOKEN RECIBIDO:", refresh_token)
+    logger.debug("Refresh token recibido: %s", bool(refresh_token))
     
     if not refresh_token:
         raise HTTPException(status_code=401, detail="Refresh token ausente")
@@ -218,7 +209,10 @@ def refresh_access_token(request: Request):
     if not user_email:
         raise HTTPException(status_code=401, detail="Refresh token inválido o expirado")
 
-    new_access_token = TokenService.create_access_token({"sub": user_email})
+    new_access_token = TokenService.create_access_token(
+        {"sub": user_email},
+        user=UserService.get_user_by_email(user_email)
+    )
 
     response = JSONResponse(content={"success": True})
     response.set_cookie(
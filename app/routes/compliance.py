@@ -3,8 +3,8 @@ from fastapi.responses import HTMLResponse
 from requests import Session
 from app.core.database import get_db
 from app.core.security import get_current_user_optional
-from app.models.models import ConsentLog, User
-from app.utils.constants import MARKETING_DESCRIPTION
+from app.models.models import User
+from app.services.compliance.consent_service import ConsentService
 from app.core.presentation.templates import render_template
 import datetime   
 from app.core.security import limiter 
@@ -59,31 +59,24 @@ def cookies_page(request: Request):
     )
 
 @router.post("/consents", status_code=201)
-def save_consent(
+async def save_consent(
     request: Request,
     policy_type: str = Form(...),  # "privacy", "cookies", "terms"
     version: str = Form(...),
     accepted: bool = Form(True),
-    db: Session = Depends(get_db),
     current_user: User | None = Depends(get_current_user_optional),
 ):
     if policy_type not in {"privacy", "cookies", "terms", "dpa_terms", "marketing"}:
         raise HTTPException(status_code=400, detail="Tipo de política inválido")
-    
-    if not current_user:
-         return Response(status_code=status.HTTP_204_NO_CONTENT)
 
-    consent = ConsentLog(
+    # Anónimos incluidos: el writer agrupa los clics del banner en inserts masivos
+    ConsentService.record(
         user_id=current_user.id if current_user else None,
         policy_type=policy_type,
         version=version,
-        description=MARKETING_DESCRIPTION.strip(),
         accepted=accepted,
-        accepted_at=datetime.datetime.utcnow(),
-        ip_address=request.client.host
+        ip_address=request.client.host,
     )
-    db.add(consent)
-    db.commit()
 
     return {"message": "Consentimiento registrado correctamente"}
 
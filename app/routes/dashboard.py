@@ -5,12 +5,15 @@ from fastapi import APIRouter, HTTPException, Query, Request, Depends
 from fastapi.responses import HTMLResponse
 from app.core.security import get_current_user
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.models.models import Order, Plan, User, Item
 from datetime import datetime, timedelta
 import os
 from app.core.presentation.templates import render_template
 from app.core.security import limiter 
+from app.services.plans.plan_catalog import plan_catalog
+from app.services.plans.plan_service import PlanService
+from app.services.users.user_summary_service import UserSummaryService
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
@@ -21,11 +24,12 @@ BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 @limiter.limit("15/minute")
 def dashboard_page(
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    item_count = db.query(Item).filter(Item.owner_id == current_user.id).count()
-    order_count = db.query(Order).filter(Order.user_id == current_user.id).count()
+    # Contadores mantenidos en user_summaries: una lectura por clave primaria.
+    # El plan sale del usuario (ya en caché) y del catálogo en memoria
+    summary = UserSummaryService.get(db, current_user.id)
 
     plan_info = get_user_plan_info(current_user, db)
     plan_name = plan_info["plan"].name if plan_info else "Sin plan"
@@ -33,8 +37,10 @@ def dashboard_page(
 
     return render_template(request, "dashboard/index.html", {
         "user": current_user,
-        "item_count": item_count,
-        "order_count": order_count,
+        "item_count": summary["item_count"],
+        "order_count": summary["order_count"],
+        "pending_orders": summary["pending_orders"],
+        "paid_orders": summary["paid_orders"],
         "plan_name": plan_name,
         "is_free_plan": is_free_plan,
         **(plan_info or {})
@@ -43,7 +49,7 @@ def dashboard_page(
 @router.get("/items", response_class=HTMLResponse)
 def dashboard_items_page(
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     items = db.query(Item).filter(Item.created_by == current_user.id).all()
@@ -59,7 +65,7 @@ def dashboard_items_page(
 @router.get("/orders", response_class=HTMLResponse)
 def dashboard_orders(
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
     page: int = 1,
     per_page: int = 10,
@@ -80,6 +86,7 @@ def dashboard_orders(
 
     return render_template(request, "dashboard/orders/index.html", {
         "orders": orders,
+        "plans": {plan.id: plan for plan in plan_catalog.all()},
         "page": page,
         "total_pages": total_pages,
     })
@@ -108,7 +115,7 @@ def profile_page(
 @router.get("/plans", response_class=HTMLResponse)
 def user_plan_page(
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     plan_info = get_user_plan_info(current_user, db)
@@ -124,12 +131,12 @@ def get_user_plan_info(user: User, db: Session) -> Optional[Dict]:
     if not user.plan_id or not user.plan_assigned_at:
         return None
 
-    plan = db.query(Plan).filter(Plan.id == user.plan_id).first()
+    plan = plan_catalog.get_by_id(user.plan_id)
     if not plan:
         return None
 
     assigned_at = user.plan_assigned_at
-    expiration_date = assigned_at + timedelta(days=plan.validity_days)
+    expiration_date = PlanService.get_plan_expiration(user)
     now = datetime.utcnow()
     days_remaining = max((expiration_date - now).days, 0)
 
@@ -139,13 +146,11 @@ def get_user_plan_info(user: User, db: Session) -> Optional[Dict]:
     elif days_remaining <= 5:
         alert = f"Tu plan vencerá en {days_remaining} día(s). Considera renovarlo pronto."
 
-    features = json.loads(plan.features) if isinstance(plan.features, str) else plan.features
-
     return {
         "plan": plan,
         "assigned_at": assigned_at,
         "expiration_date": expiration_date,
         "days_remaining": days_remaining,
         "alert": alert,
-        "features": features
+        "features": plan.features
     }
\ No newline at end of file
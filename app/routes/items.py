@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Request, Depends, Form
 from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
 from app.models.models import Item
-from app.core.security import ownership_dependency
-from app.core.presentation.templates import templates
-from app.core.security import get_current_user
+from app.core.security import ownership_dependency_async
+from app.core.security import get_current_user_async
 from app.models.models import User
 from app.core.presentation.templates import render_template
 
@@ -15,13 +15,13 @@ router = APIRouter(tags=["Item"])
 async def dashboard_add_item(
     request: Request,
     name: str = Form(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     db.add(Item(name=name, owner_id=current_user.id))
-    db.commit()
+    await db.commit()
 
-    items = db.query(Item).filter(Item.owner_id == current_user.id).all()
+    items = (await db.execute(select(Item).where(Item.owner_id == current_user.id))).scalars().all()
 
     return render_template(
         request,
@@ -33,13 +33,13 @@ async def dashboard_add_item(
 @router.delete("/items/delete/{item_id}", response_class=HTMLResponse)
 async def dashboard_delete_item(
     request: Request,
-    item: Item = Depends(ownership_dependency(Item, "item_id")),
-    db: Session = Depends(get_db)
+    item: Item = Depends(ownership_dependency_async(Item, "item_id")),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db.delete(item)
-    db.commit()
+    await db.delete(item)
+    await db.commit()
 
-    items = db.query(Item).filter(Item.owner_id == item.owner_id).all()
+    items = (await db.execute(select(Item).where(Item.owner_id == item.owner_id))).scalars().all()
 
     return render_template(
         request,
@@ -1,14 +1,16 @@
+import logging
 from fastapi import APIRouter, Cookie, Form, HTTPException, Request
 from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from app.services.mailing.mail_service import send_mail
+from app.services.mailing.mail_outbox import mail_outbox
 from app.utils.recaptcha_util import verify_recaptcha
 from app.core.presentation.templates import render_template
 from app.core.config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/mailing", tags=["Mailing"])
 
@@ -19,7 +21,7 @@ async def contact_form(
     message: str = Form(...),
     g_recaptcha_response_contact: str = Form(...)
 ):
-    print("Token recibido:", g_recaptcha_response_contact)
+    logger.debug("Token reCAPTCHA recibido (%s caracteres)", len(g_recaptcha_response_contact))
 
     if not await verify_recaptcha(g_recaptcha_response_contact, "contact"):
         raise HTTPException(status_code=400, detail="Fallo en reCAPTCHA")
@@ -28,7 +30,8 @@ async def contact_form(
     body = f"Nombre: {name}\nCorreo: {email}\n\nMensaje:\n{message}"
     reciever = settings.RECIEVER_EMAIL
 
-    if send_mail(subject, body, to_email=reciever):
+    # Se encola y el outbox envía en segundo plano
+    if mail_outbox.enqueue(subject, body, to_email=reciever):
         response = RedirectResponse(url="/mailing/thankyou", status_code=303)
         response.set_cookie(key="contact_submitted", value="true", max_age=300)  # 5 min
         return response
@@ -1,16 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.security import get_current_user
 from app.models.models import Order, Plan, User
 from app.schemas.schemas import OrderCreate, OrderOut
+from app.services.plans.plan_catalog import plan_catalog
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
 @router.get("/", response_model=List[OrderOut])
 def list_orders(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
 
@@ -23,7 +24,7 @@ def create_order(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    plan = db.query(Plan).filter(Plan.id == order_data.plan_id).first()
+    plan = plan_catalog.get_by_id(order_data.plan_id)
     if not plan:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -43,7 +44,7 @@ def create_order(
 @router.get("/{order_id}", response_model=OrderOut)
 def get_order(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     order = db.query(Order).filter(
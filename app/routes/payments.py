@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Request, Form, Depends, Query, HTTPException
 from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import get_current_user
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.security import get_current_user_async
 from app.models.models import User
 from app.core.config import get_settings
 
@@ -22,8 +22,8 @@ router = APIRouter(prefix="/payments", tags=["Payments"])
 async def checkout(
     request: Request,
     plan: str = Query(..., description="Nombre del plan"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
 ):
     if settings.PAYMENT_GATEWAY == "izipay":
         return await create_izipay_checkout(request, plan, db, current_user)
@@ -35,7 +35,7 @@ async def paid(
     request: Request,
     kr_answer: str = Form(..., alias="kr-answer"),
     kr_hash: str = Form(..., alias="kr-hash"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     if settings.PAYMENT_GATEWAY == "izipay":
         return await handle_izipay_paid(request, kr_answer, kr_hash, db)
@@ -5,8 +5,9 @@ from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from starlette.status import HTTP_302_FOUND
 from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.security import get_current_user, get_current_user_async
 from app.models.models import User
+from app.services.users.user_cache import user_cache
 from app.core.presentation.templates import render_template, templates
 from starlette.status import HTTP_200_OK
 
@@ -52,6 +53,7 @@ def update_profile_htmx(
     current_user.company = company
     current_user.job_title = job_title
     db.commit()
+    user_cache.invalidate(user_id=current_user.id)
 
     response = Response(status_code=204)
     response.headers["HX-Redirect"] = "/dashboard/profile"
@@ -63,8 +65,10 @@ def delete_account(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    user_id = current_user.id
     db.delete(current_user)
     db.commit()
+    user_cache.invalidate(user_id=user_id)
 
     response = Response(status_code=204)
     response.headers["HX-Redirect"] = "/auth/logout"
@@ -72,8 +76,7 @@ def delete_account(
 
 @router.get("/export")
 async def export_user_data(
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user)
+    current_user=Depends(get_current_user_async)
 ):
     user_data = {
         "id": current_user.id,
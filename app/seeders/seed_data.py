@@ -1,7 +1,10 @@
 from sqlalchemy.orm import Session
-from app.models.models import Plan
+from app.models.models import Plan, User
 from app.core.database import SessionLocal
 from app.core.config import get_settings
+from app.services.plans.plan_catalog import plan_catalog
+from app.services.plans.plan_service import PlanService
+from app.services.users.user_summary_service import UserSummaryService
 
 settings = get_settings()
 
@@ -28,3 +31,28 @@ def create_free_plan_if_not_exists():
             db.commit()
     finally:
         db.close()
+
+def backfill_plan_expirations():
+    # Completa users.plan_expires_at en filas con plan asignado antes de existir la columna
+    db: Session = SessionLocal()
+    try:
+        users = db.query(User).filter(
+            User.plan_id.isnot(None),
+            User.plan_assigned_at.isnot(None),
+            User.plan_expires_at.is_(None),
+        ).all()
+        for user in users:
+            plan = plan_catalog.get_by_id(user.plan_id)
+            user.plan_expires_at = PlanService.compute_expiration(plan, user.plan_assigned_at)
+        if users:
+            db.commit()
+    finally:
+        db.close()
+
+def backfill_user_summaries():
+    # Crea el resumen de usuarios previos a la tabla; los contadores existentes no se tocan
+    db: Session = SessionLocal()
+    try:
+        UserSummaryService.rebuild(db, only_missing=True)
+    finally:
+        db.close()
@@ -1,6 +1,46 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+MIN_BCRYPT_ROUNDS = 10
+MAX_BCRYPT_ROUNDS = 16
+
+
+def _build_context(rounds: int) -> CryptContext:
+    # min/max = rounds: verify_and_update marca para rehash cualquier hash con otro costo
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+pwd_context = _build_context(settings.BCRYPT_ROUNDS)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_pending = 0
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    # Pool dedicado: bcrypt libera el GIL, así que los hilos hashean en paralelo sin frenar el event loop
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            thread_name_prefix="password-hash",
+        )
+    return _executor
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 class PasswordService:
     @staticmethod
@@ -10,3 +50,83 @@ class PasswordService:
     @staticmethod
     def hash_password(password: str) -> str:
         return pwd_context.hash(password)
+
+    @staticmethod
+    def verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+        # Devuelve (válida, nuevo_hash); nuevo_hash sólo si el costo guardado difiere del actual
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+
+    @staticmethod
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        return await PasswordService._run(pwd_context.verify, plain_password, hashed_password)
+
+    @staticmethod
+    async def hash_password_async(password: str) -> str:
+        return await PasswordService._run(pwd_context.hash, password)
+
+    @staticmethod
+    async def verify_and_update_async(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+        return await PasswordService._run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+    @staticmethod
+    async def _run(func, *args):
+        global _pending
+        # Descartar carga en vez de encolar sin límite durante un pico de logins
+        if _pending >= settings.PASSWORD_HASH_MAX_PENDING:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servicio ocupado, intenta nuevamente en unos segundos",
+                headers={"Retry-After": "1"},
+            )
+
+        _pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_get_executor(), func, *args)
+        finally:
+            _pending -= 1
+
+    @staticmethod
+    def configure(rounds: int):
+        global pwd_context
+        pwd_context = _build_context(rounds)
+
+    @staticmethod
+    def current_rounds() -> int:
+        return pwd_context.to_dict()["bcrypt__rounds"]
+
+    @staticmethod
+    def calibrate_rounds(target_ms: float) -> int:
+        """
+        Elige el mayor costo de bcrypt cuyo hash no supera target_ms en esta máquina.
+        Cada ronda extra duplica el tiempo, así que basta medir el costo mínimo y extrapolar.
+        """
+        start = time.perf_counter()
+        _build_context(MIN_BCRYPT_ROUNDS).hash("calibration-password")
+        base_ms = (time.perf_counter() - start) * 1000
+
+        rounds = MIN_BCRYPT_ROUNDS
+        while rounds < MAX_BCRYPT_ROUNDS and base_ms * 2 ** (rounds + 1 - MIN_BCRYPT_ROUNDS) <= target_ms:
+            rounds += 1
+        return rounds
+
+    @staticmethod
+    def configure_from_settings():
+        # Con varios workers conviene calibrar una vez (python -m app.services.auth.password_service)
+        # y fijar BCRYPT_ROUNDS, para que todos usen el mismo costo y no re-hasheen entre sí
+        if settings.PASSWORD_HASH_TARGET_MS > 0:
+            rounds = PasswordService.calibrate_rounds(settings.PASSWORD_HASH_TARGET_MS)
+            logger.info("bcrypt calibrado: %s rondas para %s ms", rounds, settings.PASSWORD_HASH_TARGET_MS)
+            PasswordService.configure(rounds)
+
+    @staticmethod
+    def shutdown():
+        global _executor
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+if __name__ == "__main__":
+    target = settings.PASSWORD_HASH_TARGET_MS or 250
+    print(f"BCRYPT_ROUNDS={PasswordService.calibrate_rounds(target)}  # objetivo {target} ms")
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+import httpx
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from app.core.config import get_settings
+from app.core.metrics import observe_outbound
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class RecaptchaUnavailable(Exception):
+    """El verificador no respondió a tiempo o respondió algo inválido."""
+
+
+class RecaptchaVerifier:
+    """
+    Cliente HTTP compartido (keep-alive) para siteverify, con timeouts y un límite
+    de verificaciones en vuelo. El backend sólo cambia el transporte del cliente.
+    """
+
+    def __init__(self, verify_url: str, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.verify_url = verify_url
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._slots = asyncio.Semaphore(settings.RECAPTCHA_MAX_IN_FLIGHT)
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            transport=self._transport,
+            timeout=httpx.Timeout(settings.RECAPTCHA_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.RECAPTCHA_MAX_IN_FLIGHT,
+                max_keepalive_connections=settings.RECAPTCHA_MAX_IN_FLIGHT,
+            ),
+        )
+
+    async def start(self):
+        if self._client is None:
+            self._client = self._build_client()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def siteverify(self, token: str) -> dict:
+        if self._client is None:
+            await self.start()
+
+        # Esperar un cupo como mucho lo mismo que una verificación; si no, el verificador está saturado
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=settings.RECAPTCHA_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            raise RecaptchaUnavailable("Demasiadas verificaciones en curso")
+
+        start = time.perf_counter()
+        ok = False
+        try:
+            response = await self._client.post(
+                self.verify_url,
+                data={"secret": settings.RECAPTCHA_SECRET_KEY, "response": token},
+            )
+            response.raise_for_status()
+            result = response.json()
+            ok = True
+            return result
+        except (httpx.HTTPError, ValueError) as exc:
+            raise RecaptchaUnavailable(str(exc)) from exc
+        finally:
+            self._slots.release()
+            observe_outbound("recaptcha", "siteverify", time.perf_counter() - start, ok)
+
+    async def verify(self, token: str, action: str) -> bool:
+        try:
+            result = await self.siteverify(token)
+        except RecaptchaUnavailable as exc:
+            logger.warning("reCAPTCHA no disponible (%s); fail_open=%s", exc, settings.RECAPTCHA_FAIL_OPEN)
+            return settings.RECAPTCHA_FAIL_OPEN
+
+        return bool(
+            result.get("success")
+            and result.get("action") == action
+            and result.get("score", 0) >= settings.RECAPTCHA_MIN_SCORE
+        )
+
+
+async def fake_siteverify(request: Request):
+    """
+    Imita siteverify sin red. El token define la respuesta: "<action>[:<score>]",
+    p. ej. "login" o "login:0.3"; "invalid" responde success=false.
+    """
+    form = await request.form()
+    token = form.get("response", "")
+    if not token or token == "invalid":
+        return JSONResponse({"success": False, "error-codes": ["invalid-input-response"]})
+
+    action, _, score = token.partition(":")
+    return JSONResponse({
+        "success": True,
+        "action": action,
+        "score": float(score) if score else 0.9,
+        "hostname": "localhost",
+    })
+
+
+fake_siteverify_app = Starlette(routes=[Route("/recaptcha/api/siteverify", fake_siteverify, methods=["POST"])])
+
+
+def build_recaptcha_verifier() -> RecaptchaVerifier:
+    if settings.RECAPTCHA_BACKEND == "fake":
+        # En proceso (ASGITransport): tests y benchmarks de las rutas de auth sin acceso a red
+        return RecaptchaVerifier(
+            "http://recaptcha.local/recaptcha/api/siteverify",
+            transport=httpx.ASGITransport(app=fake_siteverify_app),
+        )
+    return RecaptchaVerifier(settings.RECAPTCHA_VERIFY_URL)
+
+
+recaptcha_verifier = build_recaptcha_verifier()
+
+
+if __name__ == "__main__":
+    # Servidor fake standalone: RECAPTCHA_VERIFY_URL=http://127.0.0.1:8081/recaptcha/api/siteverify
+    import uvicorn
+    uvicorn.run(fake_siteverify_app, host="127.0.0.1", port=8081)
@@ -1,9 +1,12 @@
+import calendar
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import jwt, ExpiredSignatureError, JWTError
 from fastapi import HTTPException, status
 from app.core.config import get_settings
-from app.utils.constants import REFRESH_TOKEN_TYPE, ACCESS_TOKEN_TYPE
+from app.models.models import User
+from app.services.plans.plan_service import PlanService
+from app.utils.constants import REFRESH_TOKEN_TYPE, ACCESS_TOKEN_TYPE, ENTITLEMENT_CLAIMS
 settings = get_settings()
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
@@ -24,11 +27,27 @@ class TokenService:
         return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
     @staticmethod
-    def create_access_token(data: dict) -> str:
+    def create_access_token(data: dict, user: Optional[User] = None) -> str:
+        # Modo "stateless claims": el token lleva uid/plan para que el middleware no consulte la BD
+        if user is not None and settings.AUTH_STATELESS_CLAIMS:
+            data = {**data, **TokenService.build_entitlement_claims(user)}
         expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         payload = TokenService._build_payload(data, expires)
         return TokenService._encode_token(payload)
 
+    @staticmethod
+    def build_entitlement_claims(user: User) -> dict:
+        expiration = PlanService.get_plan_expiration(user)
+        return {
+            "uid": user.id,
+            "plan_id": user.plan_id,
+            "plan_expires_at": calendar.timegm(expiration.utctimetuple()) if expiration else None,
+        }
+
+    @staticmethod
+    def has_entitlement_claims(payload: Optional[dict]) -> bool:
+        return bool(payload) and all(claim in payload for claim in ENTITLEMENT_CLAIMS)
+
     @staticmethod
     def create_refresh_token(data: dict) -> str:
         expires = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
@@ -0,0 +1,56 @@
+from datetime import datetime
+from app.core.batch_writer import BatchWriter
+from app.core.config import get_settings
+from app.models.models import ConsentLog, User
+from app.utils.constants import DPA_DESCRIPTION, MARKETING_DESCRIPTION
+
+settings = get_settings()
+
+# Clics del banner de cookies: inserts masivos en vez de un commit por clic
+consent_log_writer = BatchWriter(
+    ConsentLog,
+    batch_size=settings.CONSENT_LOG_BATCH_SIZE,
+    flush_interval=settings.CONSENT_LOG_FLUSH_SECONDS,
+    max_pending=settings.CONSENT_LOG_MAX_PENDING,
+)
+
+
+class ConsentService:
+    @staticmethod
+    def registration_consents(user: User, ip_address: str, accept_marketing: bool) -> list[ConsentLog]:
+        """Consentimientos del registro, ligados al usuario para guardarse en su mismo commit."""
+        consents = [
+            # Consentimiento obligatorio (DPA + Términos)
+            ConsentLog(
+                user=user,
+                policy_type="dpa_terms",
+                version="1.0",
+                description=DPA_DESCRIPTION.strip(),
+                accepted=True,
+                ip_address=ip_address,
+            )
+        ]
+
+        # Consentimiento opcional (marketing)
+        if accept_marketing:
+            consents.append(ConsentLog(
+                user=user,
+                policy_type="marketing",
+                version="1.0",
+                description=MARKETING_DESCRIPTION.strip(),
+                accepted=True,
+                ip_address=ip_address,
+            ))
+        return consents
+
+    @staticmethod
+    def record(user_id: int | None, policy_type: str, version: str, accepted: bool, ip_address: str):
+        consent_log_writer.add(
+            user_id=user_id,
+            policy_type=policy_type,
+            version=version,
+            description=MARKETING_DESCRIPTION.strip(),
+            accepted=accepted,
+            accepted_at=datetime.utcnow(),
+            ip_address=ip_address,
+        )
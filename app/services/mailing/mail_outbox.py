@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import random
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.models.models import FailedMail
+from app.services.mailing.mail_service import SmtpConnectionPool, build_message, smtp_pool
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutgoingMail:
+    subject: str
+    body: str
+    to_email: str
+    html: bool = False
+    attempts: int = 0
+    last_error: Optional[str] = None
+
+
+class MailOutbox:
+    """
+    Cola de correos en proceso: los handlers encolan y vuelven de inmediato.
+    Un worker por conexión del pool SMTP envía en hilos dedicados (smtplib es bloqueante);
+    los fallos se reintentan con backoff y, agotados los intentos, quedan en failed_mails.
+    """
+
+    def __init__(self, pool: SmtpConnectionPool, workers: int, max_size: int):
+        self.pool = pool
+        self.workers = workers
+        self.max_size = max_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+        self._retrying: dict[int, tuple[asyncio.TimerHandle, OutgoingMail]] = {}
+        # El loop sólo guarda referencias débiles a las tasks: sin esto una escritura
+        # a failed_mails podría recolectarse a medias
+        self._background: set[asyncio.Task] = set()
+        self._interrupted: list[OutgoingMail] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._accepting = False
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+
+    async def start(self):
+        if self._accepting:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="smtp")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._accepting = True
+
+    def enqueue(self, subject: str, body: str, to_email: str, html: bool = False) -> bool:
+        """Encola un correo; False si el outbox no está activo o está lleno."""
+        if not self._accepting:
+            logger.error("Outbox de correo inactivo: no se encoló '%s'", subject)
+            return False
+        try:
+            self._queue.put_nowait(OutgoingMail(subject, body, to_email, html))
+            return True
+        except asyncio.QueueFull:
+            logger.error("Outbox de correo lleno (%s): no se encoló '%s'", self.max_size, subject)
+            return False
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "retrying": len(self._retrying),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+        }
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            mail = await self._queue.get()
+            try:
+                msg = build_message(mail.subject, mail.body, mail.to_email, mail.html)
+                await loop.run_in_executor(self._executor, self.pool.send, msg, mail.to_email)
+                self.sent += 1
+            except asyncio.CancelledError:
+                # stop() cancela tras el drenado: el correo en vuelo se persiste con los pendientes
+                mail.last_error = mail.last_error or "Envío interrumpido por el apagado"
+                self._interrupted.append(mail)
+                raise
+            except Exception as exc:
+                mail.attempts += 1
+                mail.last_error = repr(exc)[:500]
+                await self._retry_or_fail(mail)
+            finally:
+                self._queue.task_done()
+
+    async def _retry_or_fail(self, mail: OutgoingMail):
+        if mail.attempts >= settings.MAIL_MAX_ATTEMPTS or not self._accepting:
+            logger.error("Correo '%s' para %s descartado tras %s intentos: %s",
+                         mail.subject, mail.to_email, mail.attempts, mail.last_error)
+            await self._store_failed([mail])
+            return
+
+        # Backoff exponencial con jitter; el correo vuelve a la cola al vencer
+        delay = settings.MAIL_RETRY_BACKOFF_SECONDS * 2 ** (mail.attempts - 1) * random.uniform(0.5, 1.5)
+        logger.warning("Reintento %s de '%s' en %.1fs: %s", mail.attempts, mail.subject, delay, mail.last_error)
+        self.retried += 1
+        handle = asyncio.get_running_loop().call_later(delay, self._requeue, id(mail))
+        self._retrying[id(mail)] = (handle, mail)
+
+    def _requeue(self, key: int):
+        _, mail = self._retrying.pop(key)
+        try:
+            self._queue.put_nowait(mail)
+        except asyncio.QueueFull:
+            task = asyncio.create_task(self._store_failed([mail]))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    async def _store_failed(self, mails: list[OutgoingMail]):
+        if not mails:
+            return
+        self.failed += len(mails)
+        await asyncio.get_running_loop().run_in_executor(None, store_failed_mails, mails)
+
+    async def stop(self):
+        """Deja de aceptar, espera a vaciar la cola (MAIL_DRAIN_TIMEOUT_SECONDS) y persiste el resto."""
+        if not self._accepting:
+            return
+        self._accepting = False
+
+        # Los reintentos programados se adelantan: se intentan una última vez durante el drenado
+        overflow = []
+        for handle, mail in self._retrying.values():
+            handle.cancel()
+            try:
+                self._queue.put_nowait(mail)
+            except asyncio.QueueFull:
+                overflow.append(mail)
+        self._retrying.clear()
+        await self._store_failed(overflow)
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=settings.MAIL_DRAIN_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("Outbox sin drenar al apagar: %s correos pendientes", self._queue.qsize())
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await asyncio.gather(*self._background, return_exceptions=True)
+
+        pending, self._interrupted = self._interrupted, []
+        while not self._queue.empty():
+            mail = self._queue.get_nowait()
+            mail.last_error = mail.last_error or "No enviado antes del apagado"
+            pending.append(mail)
+        await self._store_failed(pending)
+
+        self._executor.shutdown(wait=True)
+        self.pool.close_all()
+
+
+def store_failed_mails(mails: list[OutgoingMail]):
+    db = SessionLocal()
+    try:
+        db.add_all([
+            FailedMail(
+                to_email=mail.to_email,
+                subject=mail.subject,
+                body=mail.body,
+                html=mail.html,
+                attempts=mail.attempts,
+                last_error=mail.last_error,
+            )
+            for mail in mails
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+mail_outbox = MailOutbox(
+    smtp_pool,
+    workers=settings.MAIL_SMTP_POOL_SIZE,
+    max_size=settings.MAIL_OUTBOX_MAX_SIZE,
+)
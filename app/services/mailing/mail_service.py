@@ -1,11 +1,16 @@
+import logging
+import queue
 import smtplib
 import ssl
-import traceback
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from app.core.config import get_settings
+from app.core.metrics import observe_outbound
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 SMTP_PROVIDERS = {
     "gmail": {
@@ -19,6 +24,14 @@ SMTP_PROVIDERS = {
         "port": int(settings.SMTP_PORT_HOSTINGER),
         "user": settings.SMTP_USER_HOSTINGER,
         "pass": settings.SMTP_PASS_HOSTINGER
+    },
+    # Sink local para desarrollo y tests: sin TLS ni login
+    "local": {
+        "host": settings.SMTP_HOST_LOCAL,
+        "port": int(settings.SMTP_PORT_LOCAL),
+        "user": settings.RECIEVER_EMAIL or "noreply@localhost",
+        "pass": "",
+        "security": "none"
     }
 }
 
@@ -38,42 +51,113 @@ cfg["host"] = _sanitize(cfg["host"])
 cfg["user"] = _sanitize(cfg["user"])
 cfg["pass"] = _sanitize(cfg["pass"])
 # port is int already
+# SSL para el puerto 465, STARTTLS para el resto (587, ...)
+cfg.setdefault("security", "ssl" if cfg["port"] == 465 else "starttls")
 
-def send_mail(subject: str, body: str, to_email: str, html: bool = False):
-    try:
-        msg = MIMEMultipart()
-        msg["From"] = cfg["user"]
-        msg["To"] = to_email
-        msg["Subject"] = subject
-        if html:
-            msg.attach(MIMEText(body, "html"))
-        else:
-            msg.attach(MIMEText(body, "plain"))
-
-        # debug output
-        print(f"[mail] provider={provider} host={cfg['host']} port={cfg['port']} user={cfg['user']}")
-
-        # Use SSL for port 465
-        if cfg["port"] == 465:
-            context = ssl.create_default_context()
-            with smtplib.SMTP_SSL(cfg["host"], cfg["port"], context=context, timeout=15) as server:
-                server.set_debuglevel(1)  # imprime diálogo SMTP
-                server.login(cfg["user"], cfg["pass"])
-                server.sendmail(cfg["user"], to_email, msg.as_string())
+
+def build_message(subject: str, body: str, to_email: str, html: bool = False) -> MIMEMultipart:
+    msg = MIMEMultipart()
+    msg["From"] = cfg["user"]
+    msg["To"] = to_email
+    msg["Subject"] = subject
+    msg.attach(MIMEText(body, "html" if html else "plain"))
+    return msg
+
+
+class SmtpConnectionPool:
+    """
+    Conexiones SMTP autenticadas reutilizables entre envíos (thread-safe).
+    Evita pagar conexión + TLS + LOGIN por cada correo; las conexiones ociosas
+    más de MAIL_SMTP_IDLE_SECONDS se descartan porque el servidor suele cerrarlas.
+    """
+
+    def __init__(self, config: dict, size: int, idle_seconds: int, timeout: float):
+        self.config = config
+        self.idle_seconds = idle_seconds
+        self.timeout = timeout
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self) -> smtplib.SMTP:
+        host, port = self.config["host"], self.config["port"]
+        if self.config["security"] == "ssl":
+            server = smtplib.SMTP_SSL(host, port, context=ssl.create_default_context(), timeout=self.timeout)
         else:
-            # STARTTLS flow for ports like 587
-            with smtplib.SMTP(cfg["host"], cfg["port"], timeout=15) as server:
-                server.set_debuglevel(1)
+            server = smtplib.SMTP(host, port, timeout=self.timeout)
+            if self.config["security"] == "starttls":
                 server.ehlo()
                 server.starttls(context=ssl.create_default_context())
-                server.ehlo()
-                server.login(cfg["user"], cfg["pass"])
-                server.sendmail(cfg["user"], to_email, msg.as_string())
+        server.ehlo()
+        if self.config["pass"]:
+            server.login(self.config["user"], self.config["pass"])
+        return server
 
-        print(f"[OK] Email enviado usando {provider}")
+    def _checkout(self) -> tuple[smtplib.SMTP, bool]:
+        while True:
+            try:
+                server, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect(), False
+            if time.monotonic() - last_used <= self.idle_seconds:
+                return server, True
+            self._close(server)
+
+    @staticmethod
+    def _close(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def send(self, msg: MIMEMultipart, to_email: str):
+        server, reused = None, False
+        self._slots.acquire()
+        start = time.perf_counter()
+        ok = False
+        try:
+            server, reused = self._checkout()
+            try:
+                server.sendmail(self.config["user"], to_email, msg.as_string())
+            except smtplib.SMTPServerDisconnected:
+                if not reused:
+                    raise
+                # La conexión reutilizada estaba muerta: cerrarla, una nueva y un único reintento
+                self._close(server)
+                server = self._connect()
+                server.sendmail(self.config["user"], to_email, msg.as_string())
+            self._idle.put((server, time.monotonic()))
+            server = None
+            ok = True
+        finally:
+            observe_outbound("smtp", "sendmail", time.perf_counter() - start, ok)
+            if server is not None:
+                self._close(server)
+            self._slots.release()
+
+    def close_all(self):
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(server)
+
+
+smtp_pool = SmtpConnectionPool(
+    cfg,
+    size=settings.MAIL_SMTP_POOL_SIZE,
+    idle_seconds=settings.MAIL_SMTP_IDLE_SECONDS,
+    timeout=settings.MAIL_SMTP_TIMEOUT_SECONDS,
+)
+
+
+def send_mail(subject: str, body: str, to_email: str, html: bool = False):
+    """Envío síncrono (bloqueante). Desde handlers async usar mail_outbox.enqueue."""
+    try:
+        smtp_pool.send(build_message(subject, body, to_email, html), to_email)
+        logger.info("Email enviado usando %s", provider)
         return True
 
-    except Exception as e:
-        print(f"[ERROR] Fallo enviando email con {provider}: {e}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Fallo enviando email con %s", provider)
         return False
@@ -0,0 +1,112 @@
+"""
+Servidor SMTP sink mínimo (asyncio) para desarrollo, tests y benchmarks del outbox.
+
+Acepta cualquier remitente, destinatario y AUTH, y guarda los mensajes en memoria
+sin reenviarlos. Sin TLS: usar con SMTP_PROVIDER=local.
+
+Standalone: python -m app.services.mailing.smtp_sink [--port 1025]
+"""
+import argparse
+import asyncio
+import logging
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SinkMessage:
+    mail_from: str
+    rcpt_to: list[str]
+    data: str
+
+
+@dataclass
+class SmtpSink:
+    host: str = "127.0.0.1"
+    port: int = 1025
+    messages: list[SinkMessage] = field(default_factory=list)
+    connections: int = 0
+    # Si se fija, cada conexión se corta tras N mensajes (simula servidores que cierran sesiones)
+    max_messages_per_connection: int = 0
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        mail_from, rcpt_to, sent = "", [], 0
+
+        async def reply(line: str):
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        await reply("220 smtp-sink ready")
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                line = raw.decode(errors="replace").rstrip("\r\n")
+                command = line[:4].upper()
+
+                if command == "EHLO":
+                    await reply("250-smtp-sink")
+                    await reply("250 AUTH PLAIN LOGIN")
+                elif command == "HELO":
+                    await reply("250 smtp-sink")
+                elif command == "AUTH":
+                    await reply("235 2.7.0 Authentication successful")
+                elif command == "MAIL":
+                    mail_from, rcpt_to = line[10:].strip(" <>"), []
+                    await reply("250 OK")
+                elif command == "RCPT":
+                    rcpt_to.append(line[8:].strip(" <>"))
+                    await reply("250 OK")
+                elif command == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    lines = []
+                    while True:
+                        data_line = (await reader.readline()).decode(errors="replace")
+                        if data_line in (".\r\n", ".\n", ""):
+                            break
+                        lines.append(data_line[1:] if data_line.startswith("..") else data_line)
+                    self.messages.append(SinkMessage(mail_from, rcpt_to, "".join(lines)))
+                    sent += 1
+                    await reply("250 OK: queued")
+                    if self.max_messages_per_connection and sent >= self.max_messages_per_connection:
+                        break
+                elif command in ("RSET", "NOOP"):
+                    await reply("250 OK")
+                elif command == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def main(port: int):
+    sink = SmtpSink(port=port)
+    await sink.start()
+    logger.info("SMTP sink escuchando en %s:%s", sink.host, sink.port)
+    while True:
+        count = len(sink.messages)
+        await asyncio.sleep(1)
+        for message in sink.messages[count:]:
+            logger.info("Correo de %s para %s (%s bytes)", message.mail_from, message.rcpt_to, len(message.data))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=1025)
+    asyncio.run(main(parser.parse_args().port))
@@ -0,0 +1,161 @@
+import asyncio
+import base64
+import importlib.util
+import logging
+import random
+import time
+from collections import deque
+from typing import Optional
+import httpx
+from app.core.config import get_settings
+from app.core.metrics import observe_outbound
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+CREATE_PAYMENT = "/api-payment/V4/Charge/CreatePayment"
+RETRYABLE_STATUS = (502, 503, 504)
+
+
+class IzipayUnavailable(Exception):
+    """La pasarela no respondió (timeout, red, 5xx) o está saturada."""
+
+
+class EndpointStats:
+    """Latencias recientes de un endpoint de la pasarela (ventana acotada)."""
+
+    def __init__(self, window: int = 500):
+        self.samples: deque[float] = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+
+    def record(self, elapsed_ms: float, ok: bool):
+        self.calls += 1
+        self.samples.append(elapsed_ms)
+        if not ok:
+            self.errors += 1
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self.samples)
+
+        def percentile(p: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))], 2) if ordered else 0.0
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(ordered[-1], 2) if ordered else 0.0,
+        }
+
+
+class IzipayClient:
+    """
+    Cliente de larga vida para la API REST de Izipay: conexiones keep-alive
+    (HTTP/2 opcional), timeouts por llamada, concurrencia acotada y reintentos
+    con jitter sólo para llamadas idempotentes. El ciclo de vida lo maneja el lifespan.
+    """
+
+    def __init__(self, base_url: str, username: str, password: str,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url
+        self._auth_header = "Basic " + base64.b64encode(f"{username}:{password}".encode("utf-8")).decode("utf-8")
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._slots = asyncio.Semaphore(settings.IZIPAY_MAX_CONNECTIONS)
+        self._stats: dict[str, EndpointStats] = {}
+
+    def _build_client(self) -> httpx.AsyncClient:
+        http2 = settings.IZIPAY_HTTP2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("IZIPAY_HTTP2 requiere 'httpx[http2]'; se usa HTTP/1.1")
+            http2 = False
+
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            transport=self._transport,
+            http2=http2,
+            headers={"Authorization": self._auth_header, "Content-Type": "application/json"},
+            timeout=httpx.Timeout(settings.IZIPAY_TIMEOUT_SECONDS, connect=settings.IZIPAY_CONNECT_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.IZIPAY_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.IZIPAY_MAX_CONNECTIONS,
+                keepalive_expiry=60,
+            ),
+        )
+
+    async def start(self):
+        if self._client is None:
+            self._client = self._build_client()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {endpoint: stats.snapshot() for endpoint, stats in self._stats.items()}
+
+    async def call(self, endpoint: str, payload: dict, *, timeout: Optional[float] = None,
+                   idempotent: bool = False) -> dict:
+        if self._client is None:
+            await self.start()
+
+        stats = self._stats.setdefault(endpoint, EndpointStats())
+        attempts = 1 + (settings.IZIPAY_MAX_RETRIES if idempotent else 0)
+
+        for attempt in range(attempts):
+            try:
+                return await self._call_once(endpoint, payload, timeout, stats)
+            except IzipayUnavailable:
+                if attempt == attempts - 1:
+                    raise
+                stats.retries += 1
+                # Full jitter: evita que los reintentos de muchos requests lleguen juntos
+                await asyncio.sleep(random.uniform(0, settings.IZIPAY_RETRY_BACKOFF_SECONDS * 2 ** attempt))
+
+    async def _call_once(self, endpoint: str, payload: dict, timeout: Optional[float],
+                         stats: EndpointStats) -> dict:
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=settings.IZIPAY_CONNECT_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            raise IzipayUnavailable(f"Demasiadas llamadas en curso a {endpoint}")
+
+        start = time.perf_counter()
+        ok = False
+        try:
+            response = await self._client.post(
+                endpoint,
+                json=payload,
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+            )
+            if response.status_code in RETRYABLE_STATUS:
+                raise IzipayUnavailable(f"{endpoint} respondió {response.status_code}")
+            data = response.json()
+            ok = True
+            return data
+        except (httpx.HTTPError, ValueError) as exc:
+            raise IzipayUnavailable(f"{endpoint}: {exc!r}") from exc
+        finally:
+            self._slots.release()
+            elapsed = time.perf_counter() - start
+            stats.record(elapsed * 1000, ok)
+            observe_outbound("izipay", endpoint, elapsed, ok)
+
+    async def create_payment(self, order: dict) -> dict:
+        # CreatePayment sólo genera un formToken (no cobra): reintentarlo es seguro
+        return await self.call(CREATE_PAYMENT, order, idempotent=True)
+
+
+def build_izipay_client() -> IzipayClient:
+    if settings.IZIPAY_BACKEND == "mock":
+        from app.services.payments.izipay_mock import izipay_mock_app
+        return IzipayClient("http://izipay.mock", settings.IZIPAY_USERNAME, settings.IZIPAY_PASSWORD,
+                            transport=httpx.ASGITransport(app=izipay_mock_app))
+    return IzipayClient(settings.IZIPAY_ENDPOINT, settings.IZIPAY_USERNAME, settings.IZIPAY_PASSWORD)
+
+
+izipay_client = build_izipay_client()
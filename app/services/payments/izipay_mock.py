@@ -0,0 +1,83 @@
+"""
+Pasarela Izipay simulada para desarrollo, tests y benchmarks sin red.
+
+- POST /api-payment/V4/Charge/CreatePayment: responde un formToken falso
+  (con IZIPAY_MOCK_LATENCY_MS de latencia simulada).
+- POST /mock/pay: devuelve un kr-answer/kr-hash firmado con IZIPAY_HMACSHA256,
+  listo para enviarse a /payments/paid o /payments/ipn.
+
+Standalone: python -m app.services.payments.izipay_mock (IZIPAY_ENDPOINT=http://127.0.0.1:8082)
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import uuid
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+def sign_answer(answer: dict) -> dict:
+    kr_answer = json.dumps(answer)
+    kr_hash = hmac.new(
+        settings.IZIPAY_HMACSHA256.encode("utf-8"),
+        msg=kr_answer.encode("utf-8"),
+        digestmod=hashlib.sha256,
+    ).hexdigest()
+    return {"kr-answer": kr_answer, "kr-hash": kr_hash}
+
+
+def build_paid_answer(order_id: int, amount: int, order_status: str = "PAID") -> dict:
+    return {
+        "orderStatus": order_status,
+        # Mismos campos que lee payments/izipay/paid.html en la respuesta real
+        "orderDetails": {
+            "orderId": order_id,
+            "orderTotalAmount": amount,
+            "orderEffectiveAmount": amount,
+            "orderPaidAmount": amount if order_status == "PAID" else 0,
+            "orderCurrency": "PEN",
+            "mode": "TEST",
+        },
+        "transactions": [{"uuid": uuid.uuid4().hex, "amount": amount, "status": order_status}],
+    }
+
+
+async def create_payment(request: Request):
+    if not request.headers.get("authorization", "").startswith("Basic "):
+        return JSONResponse({"status": "ERROR", "answer": {"errorCode": "INT_902"}}, status_code=401)
+
+    order = await request.json()
+    if settings.IZIPAY_MOCK_LATENCY_MS:
+        await asyncio.sleep(settings.IZIPAY_MOCK_LATENCY_MS / 1000)
+
+    return JSONResponse({
+        "status": "SUCCESS",
+        "answer": {
+            "formToken": f"mock-{uuid.uuid4().hex}",
+            "orderId": order.get("orderId"),
+            "amount": order.get("amount"),
+        },
+    })
+
+
+async def pay(request: Request):
+    body = await request.json()
+    answer = build_paid_answer(body["orderId"], body.get("amount", 0), body.get("orderStatus", "PAID"))
+    return JSONResponse(sign_answer(answer))
+
+
+izipay_mock_app = Starlette(routes=[
+    Route("/api-payment/V4/Charge/CreatePayment", create_payment, methods=["POST"]),
+    Route("/mock/pay", pay, methods=["POST"]),
+])
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(izipay_mock_app, host="127.0.0.1", port=8082)
@@ -1,10 +1,10 @@
 
-import base64
 import hmac
 import hashlib
 import json
+import logging
 import secrets
-import httpx
+from collections import Counter
 from datetime import datetime, timedelta
 from urllib.parse import parse_qs
 from fastapi.responses import HTMLResponse, RedirectResponse
@@ -12,23 +12,26 @@ from app.core.presentation.templates import templates
 from app.core.config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
-IZIPAY_USERNAME = settings.IZIPAY_USERNAME
-IZIPAY_PASSWORD = settings.IZIPAY_PASSWORD
 IZIPAY_HMACSHA256 = settings.IZIPAY_HMACSHA256
 IZIPAY_ENDPOINT = settings.IZIPAY_ENDPOINT
 IZIPAY_PUBLIC_KEY = settings.IZIPAY_PUBLIC_KEY
 
 from app.models.models import Order, OrderStatus, Plan, User
-from sqlalchemy.orm import Session
+from app.services.users.user_cache import user_cache
+from app.services.users.user_summary_service import UserSummaryService
+from app.services.plans.plan_catalog import plan_catalog
+from app.services.plans.plan_service import PlanService
+from app.services.auth.token_service import TokenService
+from app.core.security import get_request_user_id
+from app.services.payments.izipay_client import IzipayUnavailable, izipay_client
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from fastapi import Request
 
 
-def build_auth_header() -> str:
-    raw = f"{IZIPAY_USERNAME}:{IZIPAY_PASSWORD}".encode("utf-8")
-    return "Basic " + base64.b64encode(raw).decode("utf-8")
-
-
 def validate_kr_hash(kr_answer: str, kr_hash: str) -> bool:
     computed_hash = hmac.new(
         IZIPAY_HMACSHA256.encode("utf-8"),
@@ -42,8 +45,8 @@ def extract_payment_uuid(query_string: str) -> str | None:
     return params.get("orderId", [None])[0]
 
 
-def create_order(db: Session, user: User, plan_name: str) -> Order:
-    plan = db.query(Plan).filter(Plan.name == plan_name).first()
+async def create_order(db: AsyncSession, user: User, plan_name: str) -> Order:
+    plan = plan_catalog.get_by_name(plan_name)
     if not plan:
         raise ValueError(f"Plan '{plan_name}' no encontrado")
 
@@ -54,12 +57,11 @@ def create_order(db: Session, user: User, plan_name: str) -> Order:
         payment_reference=None,
     )
     db.add(order)
-    db.commit()
-    db.refresh(order)
+    await db.commit()
     return order
 
 
-def process_order_payment(answer: dict, db: Session):
+async def process_order_payment(answer: dict, db: AsyncSession):
     order_details = answer.get("orderDetails", {})
     order_id = order_details.get("orderId")
     payment_uuid = None
@@ -71,19 +73,28 @@ def process_order_payment(answer: dict, db: Session):
     if not order_id:
         return None
 
-    order = db.query(Order).filter(Order.id == order_id).first()
+    # El usuario se carga junto con la orden: en async no hay lazy load implícito
+    order = (await db.execute(
+        select(Order).options(selectinload(Order.user)).where(Order.id == order_id)
+    )).scalars().first()
     if order:
         # Marcar orden como pagada
         order.status = OrderStatus.PAID
         order.payment_reference = payment_uuid
-
-        # Actualizar plan del usuario
-        user = db.query(User).filter(User.id == order.user_id).first()
-        user.plan_id = order.plan_id
-        user.plan_assigned_at = datetime.utcnow()
-
-        db.commit()
-        db.refresh(order)
+        order.form_token = None
+        order.form_token_expires_at = None
+
+        # Actualizar plan del usuario; el catálogo puede estar desactualizado o el plan borrado
+        user = order.user
+        plan = plan_catalog.get_by_id(order.plan_id) or await db.get(Plan, order.plan_id)
+        if plan:
+            PlanService.assign_plan(user, plan)
+        else:
+            logger.error("Orden %s pagada con el plan %s, que ya no existe: no se asignó plan al usuario %s",
+                         order.id, order.plan_id, user.id)
+
+        await db.commit()
+        user_cache.invalidate(user_id=user.id)
         return order
     return None
 
@@ -91,70 +102,90 @@ def process_order_payment(answer: dict, db: Session):
 async def create_izipay_checkout(
     request: Request,
     plan: str,
-    db: Session,
+    db: AsyncSession,
     current_user: User,
 ):
     if not current_user or not isinstance(current_user, User):
         return RedirectResponse(url="/auth/login", status_code=302)
 
-    plan_obj = db.query(Plan).filter(Plan.name == plan).first()
+    plan_obj = plan_catalog.get_by_name(plan)
     if not plan_obj:
         return HTMLResponse(f"Plan '{plan}' no encontrado", status_code=400)
 
-    order = (
-        db.query(Order)
-        .filter(
+    order = (await db.execute(
+        select(Order)
+        .where(
             Order.user_id == current_user.id,
             Order.plan_id == plan_obj.id,
             Order.status == OrderStatus.PENDING,
         )
         .order_by(Order.id.desc())
-        .first()
-    )
+        .limit(1)
+    )).scalars().first()
 
     if not order:
-        order = create_order(db, current_user, plan)
-
-    izipay_order = {
-        "amount":  int(plan_obj.price * 100), #decimal a entero - izipay
-        "currency": "PEN",
-        "orderId": order.id,
-        "customer": {"email": current_user.email},
-        "metadata": {"plan": plan},
-    }
-
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{IZIPAY_ENDPOINT}/api-payment/V4/Charge/CreatePayment",
-            headers={
-                "Authorization": build_auth_header(),
-                "Content-Type": "application/json",
-            },
-            json=izipay_order,
-        )
-        data = response.json()
+        order = await create_order(db, current_user, plan)
+
+    amount = int(plan_obj.price * 100)  # decimal a entero - izipay
+    formtoken = order_form_token(order, amount)
 
-    print("[DEBUG] Respuesta CreatePayment:", response.status_code, response.text)
-    features = json.loads(plan_obj.features) if isinstance(plan_obj.features, str) else plan_obj.features
+    if not formtoken:
+        izipay_order = {
+            "amount": amount,
+            "currency": "PEN",
+            "orderId": order.id,
+            "customer": {"email": current_user.email},
+            "metadata": {"plan": plan},
+        }
+
+        try:
+            data = await izipay_client.create_payment(izipay_order)
+        except IzipayUnavailable as exc:
+            logger.warning("CreatePayment falló para la orden %s: %s", order.id, exc)
+            return HTMLResponse("Pasarela de pago no disponible, intenta nuevamente", status_code=503)
+
+        logger.debug("Respuesta CreatePayment: %s", data)
+
+        if data.get("status") != "SUCCESS":
+            return HTMLResponse("Error al generar formToken", status_code=500)
 
-    if data.get("status") == "SUCCESS":
         formtoken = data["answer"]["formToken"]
-        return templates.TemplateResponse(
-            "payments/izipay/checkout.html",
-            {
-                "request": request,
-                "formtoken": formtoken,
-                "publickey": IZIPAY_PUBLIC_KEY,
-                "endpoint": IZIPAY_ENDPOINT,
-                "order_id": order.id,
-                "plan": plan_obj,
-                "features": features
-            },
-        )
+        await store_form_token(db, order, formtoken, amount)
+
+    return templates.TemplateResponse(
+        "payments/izipay/checkout.html",
+        {
+            "request": request,
+            "formtoken": formtoken,
+            "publickey": IZIPAY_PUBLIC_KEY,
+            "endpoint": IZIPAY_ENDPOINT,
+            "order_id": order.id,
+            "plan": plan_obj,
+            "features": plan_obj.features
+        },
+    )
 
-    return HTMLResponse("Error al generar formToken", status_code=500)
 
-async def handle_izipay_paid(request: Request, kr_answer: str, kr_hash: str, db: Session):
+def order_form_token(order: Order, amount: int) -> str | None:
+    # Recargas y back-navigation reutilizan el formToken: sólo se pide otro si expiró o cambió el monto
+    if (
+        order.form_token
+        and order.form_token_amount == amount
+        and order.form_token_expires_at
+        and order.form_token_expires_at > datetime.utcnow()
+    ):
+        return order.form_token
+    return None
+
+
+async def store_form_token(db: AsyncSession, order: Order, formtoken: str, amount: int):
+    order.form_token = formtoken
+    order.form_token_amount = amount
+    order.form_token_expires_at = datetime.utcnow() + timedelta(seconds=settings.IZIPAY_FORM_TOKEN_TTL_SECONDS)
+    await db.commit()
+
+
+async def handle_izipay_paid(request: Request, kr_answer: str, kr_hash: str, db: AsyncSession):
     if not validate_kr_hash(kr_answer, kr_hash):
         return templates.TemplateResponse(
             "payments/izipay/paid.html",
@@ -166,7 +197,13 @@ async def handle_izipay_paid(request: Request, kr_answer: str, kr_hash: str, db:
         )
 
     answer = json.loads(kr_answer)
-    order = process_order_payment(answer, db)
+    order = await process_order_payment(answer, db)
+
+    # El plan cambió: re-emitir los claims del access token (AuthMiddleware pone la cookie)
+    if order and get_request_user_id(request) == order.user_id:
+        request.state.renewed_token = TokenService.create_access_token(
+            {"sub": order.user.email}, user=order.user
+        )
 
     return templates.TemplateResponse(
         "payments/izipay/paid.html",
@@ -192,8 +229,14 @@ async def handle_izipay_ipn(request: Request):
 
 def cleanup_pending_orders(db: Session, max_age_minutes: int = 60):
     cutoff = datetime.utcnow() - timedelta(minutes=max_age_minutes)
-    db.query(Order).filter(
-        Order.status == OrderStatus.PENDING,
-        Order.created_at < cutoff,
-    ).delete(synchronize_session=False)
+    # DELETE masivo: no pasa por los listeners del ORM, el resumen se descuenta aquí
+    deleted = db.execute(
+        delete(Order)
+        .where(Order.status == OrderStatus.PENDING, Order.created_at < cutoff)
+        .returning(Order.user_id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    connection = db.connection()
+    for user_id, count in Counter(deleted).items():
+        UserSummaryService.apply(connection, user_id, {"order_count": -count, "pending_orders": -count})
     db.commit()
\ No newline at end of file
@@ -0,0 +1,98 @@
+import json
+import threading
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Optional
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.models.models import Plan
+
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class CatalogPlan:
+    id: int
+    name: str
+    price: Decimal
+    description: Optional[str]
+    features: Any
+    is_free: bool
+    validity_days: Optional[int]
+
+    @classmethod
+    def from_model(cls, plan: Plan) -> "CatalogPlan":
+        features = json.loads(plan.features) if isinstance(plan.features, str) else plan.features
+        return cls(
+            id=plan.id,
+            name=plan.name,
+            price=plan.price,
+            description=plan.description,
+            features=features,
+            is_free=bool(plan.is_free),
+            validity_days=plan.validity_days,
+        )
+
+
+class PlanCatalog:
+    """
+    Catálogo de planes en memoria, indexado por id y por nombre y con las features
+    ya parseadas. Se recarga completo cuando cambia la versión (invalidate) o vence el TTL.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._version = 0
+        self._loaded_version = -1
+        self._expires_at = 0.0
+        # (por id, por nombre): se reemplaza en bloque para que los lectores no vean mezclas
+        self._indexes: tuple[dict[int, CatalogPlan], dict[str, CatalogPlan]] = ({}, {})
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def invalidate(self):
+        self._version += 1
+
+    def get_by_id(self, plan_id: Optional[int]) -> Optional[CatalogPlan]:
+        if plan_id is None:
+            return None
+        return self._snapshot()[0].get(plan_id)
+
+    def get_by_name(self, name: Optional[str]) -> Optional[CatalogPlan]:
+        if not name:
+            return None
+        return self._snapshot()[1].get(name)
+
+    def all(self) -> list[CatalogPlan]:
+        return list(self._snapshot()[0].values())
+
+    def _snapshot(self) -> tuple[dict, dict]:
+        if self._loaded_version != self._version or self._expires_at < time.monotonic():
+            self._reload()
+        return self._indexes
+
+    def _reload(self):
+        with self._lock:
+            version = self._version
+            if self._loaded_version == version and self._expires_at >= time.monotonic():
+                return  # otro hilo ya lo recargó
+
+            db = SessionLocal()
+            try:
+                plans = [CatalogPlan.from_model(plan) for plan in db.query(Plan).all()]
+            finally:
+                db.close()
+
+            self._indexes = (
+                {plan.id: plan for plan in plans},
+                {plan.name: plan for plan in plans},
+            )
+            self._loaded_version = version
+            self._expires_at = time.monotonic() + self.ttl_seconds
+
+
+plan_catalog = PlanCatalog(ttl_seconds=settings.PLAN_CATALOG_TTL_SECONDS)
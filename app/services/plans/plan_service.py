@@ -1,20 +1,58 @@
+import time
 from datetime import datetime, timedelta
-from app.models.models import User, Plan
-from app.core.database import SessionLocal
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.models.models import User
+from app.services.plans.plan_catalog import plan_catalog
 
 class PlanService:
     @staticmethod
-    def get_plan_status(user: User) -> str:
+    def compute_expiration(plan, assigned_at: datetime) -> Optional[datetime]:
+        if not plan or plan.validity_days is None or not assigned_at:
+            return None
+        return assigned_at + timedelta(days=plan.validity_days)
+
+    @staticmethod
+    def assign_plan(user: User, plan, assigned_at: Optional[datetime] = None):
+        # Único punto donde se asigna plan: mantiene plan_expires_at sincronizado
+        assigned_at = assigned_at or datetime.utcnow()
+        user.plan_id = plan.id
+        user.plan_assigned_at = assigned_at
+        user.plan_expires_at = PlanService.compute_expiration(plan, assigned_at)
+
+    @staticmethod
+    def get_plan_expiration(user: User) -> Optional[datetime]:
         if not user or not user.plan_id or not user.plan_assigned_at:
+            return None
+
+        if user.plan_expires_at:
+            return user.plan_expires_at
+
+        # Filas anteriores a la columna que aún no pasaron por el backfill
+        return PlanService.compute_expiration(plan_catalog.get_by_id(user.plan_id), user.plan_assigned_at)
+
+    @staticmethod
+    def get_plan_status(user: User) -> str:
+        expiration = PlanService.get_plan_expiration(user)
+        if not expiration:
             return "no_plan"
+        return "active" if datetime.utcnow() <= expiration else "expired"
 
-        db = SessionLocal()
-        try:
-            plan = db.query(Plan).filter(Plan.id == user.plan_id).first()
-            if not plan:
-                return "no_plan"
+    @staticmethod
+    def get_plan_status_from_claims(claims: dict) -> str:
+        # Mismo criterio que get_plan_status pero con los claims del access token (sin BD)
+        expires_at = claims.get("plan_expires_at")
+        if not claims.get("plan_id") or expires_at is None:
+            return "no_plan"
+        return "active" if time.time() <= expires_at else "expired"
 
-            expiration = user.plan_assigned_at + timedelta(days=plan.validity_days)
-            return "active" if datetime.utcnow() <= expiration else "expired"
-        finally:
-            db.close()
+    @staticmethod
+    def get_users_expiring_within(db: Session, days: int) -> list[User]:
+        # Rango sobre el índice de users.plan_expires_at
+        now = datetime.utcnow()
+        return (
+            db.query(User)
+            .filter(User.plan_expires_at >= now, User.plan_expires_at < now + timedelta(days=days))
+            .order_by(User.plan_expires_at)
+            .all()
+        )
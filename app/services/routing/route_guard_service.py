@@ -1,19 +1,107 @@
+import enum
+from dataclasses import dataclass, replace
+from typing import Optional
+
+
+class RouteClass(str, enum.Enum):
+    PUBLIC = "public"
+    AUTH = "auth"              # login/register: públicas, pero redirigen si ya hay sesión
+    PROTECTED = "protected"    # requieren sesión
+    PLAN_GATED = "plan_gated"  # requieren sesión y plan activo
+
+
+@dataclass(frozen=True)
+class RoutePolicy:
+    route_class: RouteClass = RouteClass.PUBLIC
+    csrf_exempt: bool = False
+    header_policy: str = "default"
+
+
+EXACT = "exact"
+PREFIX = "prefix"  # por segmentos: "/items" cubre "/items" y "/items/..."
+
+# Tabla única de políticas por ruta (auth, CSRF y security headers).
+# Para cada atributo gana la regla más específica: exacta sobre prefijo, prefijo más largo sobre corto.
+ROUTE_POLICY_TABLE = [
+    ("/", EXACT, {"route_class": RouteClass.PUBLIC}),
+    ("/static", PREFIX, {"route_class": RouteClass.PUBLIC}),
+    ("/auth", PREFIX, {"route_class": RouteClass.PUBLIC}),
+    ("/auth/login", EXACT, {"route_class": RouteClass.AUTH}),
+    ("/auth/register", EXACT, {"route_class": RouteClass.AUTH}),
+    ("/dashboard", PREFIX, {"route_class": RouteClass.PLAN_GATED}),
+    ("/items", PREFIX, {"route_class": RouteClass.PLAN_GATED}),
+    ("/payments", PREFIX, {"route_class": RouteClass.PLAN_GATED}),
+    ("/payments/checkout", PREFIX, {"route_class": RouteClass.PROTECTED, "header_policy": "checkout"}),
+    ("/payments/paid", PREFIX, {"route_class": RouteClass.PROTECTED}),
+    ("/payments/paid", EXACT, {"csrf_exempt": True}),   # Izipay success return
+    ("/payments/ipn", EXACT, {"csrf_exempt": True}),    # Izipay webhook
+    ("/consents", EXACT, {"csrf_exempt": True}),        # Cookie banner
+    ("/docs", PREFIX, {"header_policy": "docs"}),
+    ("/redoc", PREFIX, {"header_policy": "docs"}),
+]
+
+
+class _RouteNode:
+    __slots__ = ("children", "exact_rules", "prefix_rules", "exact_policy", "prefix_policy")
+
+    def __init__(self):
+        self.children: dict[str, "_RouteNode"] = {}
+        self.exact_rules: dict = {}
+        self.prefix_rules: dict = {}
+        self.exact_policy: Optional[RoutePolicy] = None
+        self.prefix_policy: Optional[RoutePolicy] = None
+
+
+def _segments(path: str) -> list[str]:
+    return [segment for segment in path.split("/") if segment]
+
+
+def compile_route_table(table: list) -> _RouteNode:
+    """Compila la tabla en un trie por segmentos con la política ya resuelta en cada nodo."""
+    root = _RouteNode()
+    for pattern, mode, attributes in table:
+        node = root
+        for segment in _segments(pattern):
+            node = node.children.setdefault(segment, _RouteNode())
+        rules = node.exact_rules if mode == EXACT else node.prefix_rules
+        rules.update(attributes)
+
+    def resolve(node: _RouteNode, inherited: RoutePolicy):
+        node.prefix_policy = replace(inherited, **node.prefix_rules)
+        node.exact_policy = replace(node.prefix_policy, **node.exact_rules)
+        for child in node.children.values():
+            resolve(child, node.prefix_policy)
+
+    resolve(root, RoutePolicy())
+    return root
+
+
 class RouteGuard:
-    PUBLIC_PATHS = ["/auth", "/static", "/"]
-    PROTECTED_PATHS = ["/dashboard", "/items", "/payments"]
+    _routes = compile_route_table(ROUTE_POLICY_TABLE)
+
+    @staticmethod
+    def classify(path: str) -> RoutePolicy:
+        # Un recorrido del trie: O(longitud del path), sin depender del orden de la tabla
+        node = RouteGuard._routes
+        for segment in _segments(path):
+            child = node.children.get(segment)
+            if child is None:
+                return node.prefix_policy
+            node = child
+        return node.exact_policy
 
     @staticmethod
     def is_public(path: str) -> bool:
-        return any(path == p or path.startswith(p + "/") for p in RouteGuard.PUBLIC_PATHS)
+        return RouteGuard.classify(path).route_class in (RouteClass.PUBLIC, RouteClass.AUTH)
 
     @staticmethod
     def is_protected(path: str) -> bool:
-        return any(path == p or path.startswith(p + "/") for p in RouteGuard.PROTECTED_PATHS)
+        return RouteGuard.classify(path).route_class in (RouteClass.PROTECTED, RouteClass.PLAN_GATED)
 
     @staticmethod
     def should_block_plan_access(path: str) -> bool:
-        return not path.startswith("/payments/checkout") and not path.startswith("/payments/paid")
+        return RouteGuard.classify(path).route_class == RouteClass.PLAN_GATED
 
     @staticmethod
     def is_auth_route(path: str) -> bool:
-        return path in ["/auth/login", "/auth/register"]
+        return RouteGuard.classify(path).route_class == RouteClass.AUTH
@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from app.core.config import get_settings
+from app.core.metrics import USER_CACHE_EVICTIONS, USER_CACHE_LOOKUPS, USER_CACHE_SIZE
+from app.models.models import User
+
+settings = get_settings()
+
+
+class UserCache:
+    """
+    Caché LRU con TTL de usuarios desacoplados de sesión, indexada por id y por email.
+    Las instancias cacheadas son de solo lectura: quien necesite modificarlas debe
+    adjuntarlas a su sesión con db.merge().
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, tuple[float, User]]" = OrderedDict()
+        self._email_index: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def get_by_id(self, user_id: int) -> Optional[User]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            return self._get(user_id)
+
+    def get_by_email(self, email: str) -> Optional[User]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            return self._get(self._email_index.get(email))
+
+    def set(self, user: User):
+        if not self.enabled or user is None:
+            return
+        with self._lock:
+            self._remove(user.id)
+            self._entries[user.id] = (time.monotonic() + self.ttl_seconds, user)
+            self._email_index[user.email] = user.id
+            while len(self._entries) > self.max_size:
+                oldest_id = next(iter(self._entries))
+                self._remove(oldest_id)
+                self.evictions += 1
+                USER_CACHE_EVICTIONS.inc()
+            USER_CACHE_SIZE.set(len(self._entries))
+
+    def invalidate(self, user_id: Optional[int] = None, email: Optional[str] = None):
+        with self._lock:
+            if user_id is None and email is not None:
+                user_id = self._email_index.get(email)
+            if user_id is not None and self._remove(user_id):
+                self.invalidations += 1
+                USER_CACHE_SIZE.set(len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._email_index.clear()
+            USER_CACHE_SIZE.set(0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _get(self, user_id: Optional[int]) -> Optional[User]:
+        entry = self._entries.get(user_id) if user_id is not None else None
+        if entry is None:
+            self.misses += 1
+            USER_CACHE_LOOKUPS.labels("miss").inc()
+            return None
+
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            self._remove(user_id)
+            self.misses += 1
+            USER_CACHE_LOOKUPS.labels("miss").inc()
+            USER_CACHE_SIZE.set(len(self._entries))
+            return None
+
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        USER_CACHE_LOOKUPS.labels("hit").inc()
+        return user
+
+    def _remove(self, user_id: int) -> bool:
+        entry = self._entries.pop(user_id, None)
+        if entry is None:
+            return False
+        email = entry[1].email
+        if self._email_index.get(email) == user_id:
+            del self._email_index[email]
+        return True
+
+
+user_cache = UserCache(
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+)
@@ -1,18 +1,37 @@
 from typing import Optional
 
-from requests import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.models import User
-from app.core.database import SessionLocal
+from app.core.database import read_session
+from app.services.users.user_cache import user_cache
 
 class UserService:
     @staticmethod
     def get_user_by_email(email: str) -> User | None:
-        db = SessionLocal()
+        user = user_cache.get_by_email(email)
+        if user:
+            return user
+        return UserService._load_user(User.email == email)
+
+    @staticmethod
+    def get_user_by_id(user_id: int) -> User | None:
+        user = user_cache.get_by_id(user_id)
+        if user:
+            return user
+        return UserService._load_user(User.id == user_id)
+
+    @staticmethod
+    def _load_user(criteria) -> User | None:
+        db = read_session()
         try:
-            return db.query(User).filter(User.email == email).first()
+            user = db.query(User).filter(criteria).first()
+            user_cache.set(user)
+            return user
         finally:
             db.close()
             
     @staticmethod
-    def get_by_email(db: Session, email: str) -> Optional[User]:
-        return db.query(User).filter(User.email == email).first()
\ No newline at end of file
+    async def get_by_email(db: AsyncSession, email: str) -> Optional[User]:
+        result = await db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
@@ -0,0 +1,138 @@
+import sys
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from app.models.models import Item, Order, OrderStatus, User, UserSummary
+
+summaries = UserSummary.__table__
+
+STATUS_COLUMNS = {
+    OrderStatus.PENDING: "pending_orders",
+    OrderStatus.PAID: "paid_orders",
+    OrderStatus.CANCELED: "canceled_orders",
+}
+COUNTER_COLUMNS = ("item_count", "order_count", *STATUS_COLUMNS.values())
+
+
+def order_deltas(status, sign: int) -> dict[str, int]:
+    deltas = {"order_count": sign}
+    if status is not None:
+        deltas[STATUS_COLUMNS[OrderStatus(status)]] = sign
+    return deltas
+
+
+def insert_ignoring_existing(connection: Connection):
+    # Dos transacciones pueden crear la fila del mismo usuario a la vez: gana una
+    if connection.dialect.name == "postgresql":
+        return postgresql.insert(summaries).on_conflict_do_nothing(index_elements=["user_id"])
+    if connection.dialect.name == "sqlite":
+        return sqlite.insert(summaries).on_conflict_do_nothing(index_elements=["user_id"])
+    return insert(summaries)
+
+
+class UserSummaryService:
+    @staticmethod
+    def apply(connection: Connection, user_id: Optional[int], deltas: dict[str, int]):
+        """
+        Suma `deltas` a los contadores del usuario en la misma conexión (y transacción)
+        del flush que los originó: si la transacción hace rollback, el resumen también.
+        Sin fila no hace nada: dentro de un flush no se puede recontar (con varias
+        filas, las demás ya se insertaron y sumarían dos veces). El dashboard cuenta
+        en vivo hasta que `rebuild(only_missing=True)` (al arrancar) la crea.
+        """
+        deltas = {column: delta for column, delta in deltas.items() if delta}
+        if user_id is None or not deltas:
+            return
+
+        increments = {column: summaries.c[column] + delta for column, delta in deltas.items()}
+        increments["updated_at"] = datetime.utcnow()
+        connection.execute(update(summaries).where(summaries.c.user_id == user_id).values(**increments))
+
+    @staticmethod
+    def compute(connection, user_id: int) -> dict:
+        """Contadores de un usuario calculados desde items y orders."""
+        counts = {column: 0 for column in COUNTER_COLUMNS}
+        counts["item_count"] = connection.execute(
+            select(func.count()).select_from(Item).where(Item.owner_id == user_id)
+        ).scalar_one()
+        rows = connection.execute(
+            select(Order.status, func.count()).where(Order.user_id == user_id).group_by(Order.status)
+        ).all()
+        for status, count in rows:
+            counts["order_count"] += count
+            counts[STATUS_COLUMNS[OrderStatus(status)]] += count
+        counts["user_id"] = user_id
+        counts["updated_at"] = datetime.utcnow()
+        return counts
+
+    @staticmethod
+    def get(db: Session, user_id: int) -> dict:
+        """Una lectura por clave primaria; sin fila (usuario aún no reconstruido) cuenta en vivo."""
+        row = db.execute(select(summaries).where(summaries.c.user_id == user_id)).mappings().first()
+        if row is not None:
+            return dict(row)
+        return UserSummaryService.compute(db, user_id)
+
+    @staticmethod
+    def create_empty(connection: Connection, user_id: int):
+        connection.execute(insert_ignoring_existing(connection).values(
+            user_id=user_id, updated_at=datetime.utcnow(), **{column: 0 for column in COUNTER_COLUMNS}
+        ))
+
+    @staticmethod
+    def remove(connection: Connection, user_id: int):
+        connection.execute(delete(summaries).where(summaries.c.user_id == user_id))
+
+    @staticmethod
+    def rebuild(db: Session, only_missing: bool = False) -> int:
+        """
+        Recalcula el resumen de todos los usuarios con tres consultas agrupadas.
+        Con only_missing=True sólo crea las filas que faltan (arranque, usuarios
+        previos a la tabla); sin él reemplaza todas, para reparar contadores.
+        Los flushes concurrentes a la reconstrucción completa pueden perderse:
+        correrla con poco tráfico.
+        """
+        user_ids = select(User.id)
+        if only_missing:
+            user_ids = user_ids.where(~select(summaries.c.user_id).where(summaries.c.user_id == User.id).exists())
+        user_ids = db.execute(user_ids).scalars().all()
+        if not user_ids:
+            return 0
+
+        now = datetime.utcnow()
+        rows = {user_id: {"user_id": user_id, "updated_at": now, **{column: 0 for column in COUNTER_COLUMNS}}
+                for user_id in user_ids}
+
+        for owner_id, count in db.execute(
+            select(Item.owner_id, func.count()).where(Item.owner_id.isnot(None)).group_by(Item.owner_id)
+        ):
+            if owner_id in rows:
+                rows[owner_id]["item_count"] = count
+
+        for user_id, status, count in db.execute(
+            select(Order.user_id, Order.status, func.count()).group_by(Order.user_id, Order.status)
+        ):
+            if user_id in rows:
+                rows[user_id]["order_count"] += count
+                rows[user_id][STATUS_COLUMNS[OrderStatus(status)]] += count
+
+        if not only_missing:
+            db.execute(delete(summaries))
+        db.execute(insert(summaries), list(rows.values()))
+        db.commit()
+        return len(rows)
+
+
+if __name__ == "__main__":
+    # python -m app.services.users.user_summary_service [--missing]
+    from app.core.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        rebuilt = UserSummaryService.rebuild(session, only_missing="--missing" in sys.argv[1:])
+    finally:
+        session.close()
+    print(f"Resumen reconstruido para {rebuilt} usuario(s)")
@@ -1,9 +1,10 @@
 from datetime import datetime, timedelta
 import re
 from fastapi import HTTPException
-from requests import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.models import User
+from app.services.users.user_cache import user_cache
 from app.utils.constants import LOCK_TIME_MINUTES, MAX_FAILED_ATTEMPTS
 
 def validate_password_strength(password: str):
@@ -24,19 +25,19 @@ def is_user_blocked(user: User) -> bool:
     return bool(user.lock_until and user.lock_until > datetime.utcnow())
 
 # Registra un intento fallido y bloquea si alcanza el límite
-def register_failed_attempt(db: Session, user: User):
+async def register_failed_attempt(db: AsyncSession, user: User):
     user.failed_attempts = (user.failed_attempts or 0) + 1
     if user.failed_attempts >= MAX_FAILED_ATTEMPTS:
         user.lock_until = datetime.utcnow() + timedelta(minutes=LOCK_TIME_MINUTES)
         user.failed_attempts = 0  # reset tras bloqueo, opcional
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    user_cache.invalidate(user_id=user.id)
 
 # Resetea contador tras login exitoso
-def reset_attempts(db: Session, user: User):
+async def reset_attempts(db: AsyncSession, user: User):
     user.failed_attempts = 0
     user.lock_until = None
     db.add(user)
-    db.commit()
-    db.refresh(user)
\ No newline at end of file
+    await db.commit()
+    user_cache.invalidate(user_id=user.id)
\ No newline at end of file
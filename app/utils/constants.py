@@ -1,6 +1,8 @@
 # Token types
 ACCESS_TOKEN_TYPE = "access"
 REFRESH_TOKEN_TYPE = "refresh"
+# Claims del access token en modo AUTH_STATELESS_CLAIMS
+ENTITLEMENT_CLAIMS = ("uid", "plan_id", "plan_expires_at")
 MAX_FAILED_ATTEMPTS = 5          
 LOCK_TIME_MINUTES = 30  
 DPA_DESCRIPTION = """
@@ -22,3 +24,31 @@ para garantizar su funcionamiento, mejorar la experiencia de usuario, analizar e
 mostrar publicidad personalizada. Entiendo que puedo gestionar mis preferencias de cookies en cualquier momento a través 
 del panel de configuración disponible en la plataforma, así como obtener más información en la propia política.
 """
+
+# Content-Security-Policy por clase de ruta ({nonce} se reemplaza por el nonce del response con CSP_NONCE_ENABLED)
+CSP_CHECKOUT = (
+    "default-src 'self'; "
+    "script-src 'self' 'unsafe-inline' https://cdn.tailwindcss.com https://static.micuentaweb.pe https://secure.micuentaweb.pe https://h.online-metrix.net https://*.online-metrix.net; "
+    "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com https://static.micuentaweb.pe https://cdn.jsdelivr.net; "
+    "img-src 'self' data: https://img.icons8.com https://cdn.jsdelivr.net https://static.micuentaweb.pe https://h.online-metrix.net https://*.online-metrix.net; "
+    "font-src 'self' https://fonts.gstatic.com; "
+    "frame-src https://secure.micuentaweb.pe https://static.micuentaweb.pe https://h.online-metrix.net https://*.online-metrix.net; "
+    "connect-src 'self' https://secure.micuentaweb.pe https://h.online-metrix.net https://*.online-metrix.net; "
+    "object-src 'none';"
+)
+CSP_DOCS = (
+    "default-src 'self'; "
+    "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://cdn.jsdelivr.net; "
+    "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://fonts.googleapis.com; "
+    "img-src 'self' data: https://fastapi.tiangolo.com https://cdn.jsdelivr.net; "
+    "font-src 'self' https://fonts.gstatic.com; "
+    "object-src 'none';"
+)
+CSP_DEFAULT = (
+    "default-src 'self' https://www.google.com/recaptcha/; "
+    "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://cdn.twind.style/ https://cdn.tailwindcss.com https://www.google.com/recaptcha/ https://www.gstatic.com/recaptcha/ https://www.gstatic.com/recaptcha/; "
+    "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://fonts.googleapis.com; "
+    "img-src 'self' data: https://img.icons8.com https://cdn.jsdelivr.net; "
+    "font-src 'self' https://fonts.gstatic.com; "
+    "object-src 'none';"
+)
@@ -0,0 +1,105 @@
+"""
+Benchmark de carga de POST /auth/login sin acceso a red.
+
+Usa el backend fake de reCAPTCHA (siteverify en proceso) y un cliente httpx con
+ASGITransport. Además de la latencia, mide el retraso máximo del event loop:
+si bcrypt o reCAPTCHA bloquearan el loop, se vería aquí.
+
+Uso:
+    python benchmarks/auth_login.py [--requests 200] [--concurrency 20]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ["RECAPTCHA_BACKEND"] = "fake"
+
+import httpx
+
+from app.core.database import SessionLocal
+from app.core.security import limiter
+from app.main import create_app
+from app.models.models import User
+from app.services.auth.password_service import PasswordService
+
+BENCH_EMAIL = "bench-login@example.com"
+BENCH_PASSWORD = "Bench-Password-123"
+
+
+def ensure_user():
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == BENCH_EMAIL).first()
+        if not user:
+            db.add(User(email=BENCH_EMAIL, hashed_password=PasswordService.hash_password(BENCH_PASSWORD)))
+            db.commit()
+    finally:
+        db.close()
+
+
+async def monitor_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def login(client: httpx.AsyncClient) -> float:
+    start = time.perf_counter()
+    response = await client.post("/auth/login", data={
+        "email": BENCH_EMAIL,
+        "password": BENCH_PASSWORD,
+        "g_recaptcha_response": "login",
+    })
+    assert response.status_code == 302, response.status_code
+    return time.perf_counter() - start
+
+
+async def main(requests: int, concurrency: int):
+    logging.disable(logging.INFO)
+    limiter.enabled = False  # el rate limit por IP cortaría la carga a los 7 intentos
+
+    app = create_app()
+    ensure_user()
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(client):
+        async with semaphore:
+            return await login(client)
+
+    # Un cliente por login: sin cookies de sesión compartidas entre intentos
+    async def one():
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await bounded(client)
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(monitor_loop_lag(stop))
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    max_lag = await lag_task
+
+    latencies.sort()
+    print(f"bcrypt rounds:      {PasswordService.current_rounds()}")
+    print(f"requests:           {requests} (concurrency {concurrency})")
+    print(f"throughput:         {requests / elapsed:.1f} req/s")
+    print(f"latency p50 / p95:  {statistics.median(latencies) * 1000:.1f} / "
+          f"{latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms")
+    print(f"max event loop lag: {max_lag * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
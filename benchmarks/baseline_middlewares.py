@@ -0,0 +1,313 @@
+"""
+Stack de middlewares anterior (commit 30890af), copiado para benchmarks/middleware_overhead.py.
+
+Son las clases BaseHTTPMiddleware originales (CSRF, Logger, Auth, SecureHeaders) con los
+helpers que usaban en ese commit (RouteGuard por listas, una sesión de BD por consulta
+de usuario o plan, log de seguridad con commit propio), para que la comparación no
+herede las optimizaciones del código actual. Cambios respecto al original: sin los
+print de depuración de CSRF ni el logging.basicConfig del módulo. No se usa en la app.
+"""
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from fastapi import HTTPException
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, RedirectResponse, Response
+from app.core.context import set_current_user_id
+from app.core.database import SessionLocal
+from app.core.presentation.templates import templates
+from app.models.models import Plan, SecurityLog, User
+from app.services.auth.token_service import TokenService
+
+
+# --- Helpers de 30890af ---
+
+class RouteGuard:
+    PUBLIC_PATHS = ["/auth", "/static", "/"]
+    PROTECTED_PATHS = ["/dashboard", "/items", "/payments"]
+
+    @staticmethod
+    def is_public(path: str) -> bool:
+        return any(path == p or path.startswith(p + "/") for p in RouteGuard.PUBLIC_PATHS)
+
+    @staticmethod
+    def is_protected(path: str) -> bool:
+        return any(path == p or path.startswith(p + "/") for p in RouteGuard.PROTECTED_PATHS)
+
+    @staticmethod
+    def should_block_plan_access(path: str) -> bool:
+        return not path.startswith("/payments/checkout") and not path.startswith("/payments/paid")
+
+    @staticmethod
+    def is_auth_route(path: str) -> bool:
+        return path in ["/auth/login", "/auth/register"]
+
+
+def get_user_by_email(email: str) -> User | None:
+    db = SessionLocal()
+    try:
+        return db.query(User).filter(User.email == email).first()
+    finally:
+        db.close()
+
+
+def get_plan_status(user: User) -> str:
+    if not user or not user.plan_id or not user.plan_assigned_at:
+        return "no_plan"
+
+    db = SessionLocal()
+    try:
+        plan = db.query(Plan).filter(Plan.id == user.plan_id).first()
+        if not plan:
+            return "no_plan"
+
+        expiration = user.plan_assigned_at + timedelta(days=plan.validity_days)
+        return "active" if datetime.utcnow() <= expiration else "expired"
+    finally:
+        db.close()
+
+
+def get_current_user_optional(request: Request) -> Optional[User]:
+    token = request.cookies.get("access_token")
+    if not token:
+        return None
+
+    if token.startswith("Bearer "):
+        token = token.split(" ")[1]
+
+    payload = TokenService.decode_token(token)
+    email = payload.get("sub") if payload else None
+
+    if not email:
+        return None
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == email).first()
+        if user:
+            request.state.user = user
+        return user
+    finally:
+        db.close()
+
+
+async def log_security_event(user_id, ip_address, event_type, description=None):
+    db = SessionLocal()
+    try:
+        log = SecurityLog(
+            user_id=user_id,
+            ip_address=ip_address,
+            event_type=event_type,
+            description=description
+        )
+        db.add(log)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+# --- Middlewares de 30890af ---
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+EXEMPT_PATHS = [
+    "/payments/paid",   # Izipay success return
+    "/payments/ipn",    # Izipay webhook
+    "/consents",    # Izipay webhook
+]
+
+
+class CSRFMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        path = request.url.path
+
+        # Si es un método seguro o una ruta exenta, dejar pasar
+        if request.method in SAFE_METHODS or path in EXEMPT_PATHS:
+            return await call_next(request)
+
+        # Si es método sensible, verificar CSRF sólo si hay usuario autenticado
+        user = get_current_user_optional(request)
+        if user:
+            token = request.headers.get("x-csrf-token")
+            session_token = request.cookies.get("csrf_token")
+
+            if not token or not session_token or token != session_token:
+                await log_security_event(user.id, request.client.host, "csrf_failed", f"CSRF token inválido en {path}")
+
+                raise HTTPException(status_code=403, detail="CSRF token inválido o ausente")
+
+        return await call_next(request)
+
+
+class LoggerMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.perf_counter()
+
+        method = request.method
+        url = str(request.url)
+        client_host = request.client.host if request.client else "unknown"
+        user_agent = request.headers.get("user-agent", "unknown")
+
+        logging.info(f"📥 {method} {url} - IP: {client_host} - UA: {user_agent}")
+
+        # Ejecutar la siguiente capa del middleware
+        response = await call_next(request)
+
+        process_time = (time.perf_counter() - start_time) * 1000
+        status_code = response.status_code
+
+        # Colores para códigos HTTP
+        status_color = (
+            "\033[92m" if 200 <= status_code < 300 else  # Verde
+            "\033[93m" if 300 <= status_code < 400 else  # Amarillo
+            "\033[91m"                                   # Rojo
+        )
+
+        logging.info(
+            f"📤 {status_color}{status_code}\033[0m "
+            f"({process_time:.2f} ms)"
+        )
+
+        return response
+
+
+class AuthMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        path = request.url.path
+        token = request.cookies.get("access_token")
+        refresh_token = request.cookies.get("refresh_token")
+        user = None
+        ip = request.client.host
+
+        # Obtener usuario si token válido
+        username = TokenService.get_subject_from_token(token)
+        if username:
+            user = get_user_by_email(username)
+            if user:
+                set_current_user_id(user.id)
+
+        # Si no hay access_token pero sí refresh, renovar
+        if not user and refresh_token and not path.startswith("/auth/logout"):
+            username = TokenService.get_subject_from_token(refresh_token)
+            if username:
+                user = get_user_by_email(username)
+                if user:
+                    new_token = TokenService.create_access_token({"sub": username})
+                    request.state.renewed_token = new_token
+                    set_current_user_id(user.id)
+
+        # Redirigir si usuario ya autenticado e intenta ir a /login o /register
+        if RouteGuard.is_auth_route(path) and user:
+            return RedirectResponse(url="/dashboard")
+
+        # Permitir rutas públicas
+        if RouteGuard.is_public(path):
+            response = await call_next(request)
+            return self._add_renewed_token_if_needed(request, response)
+
+        # Proteger rutas privadas
+        if RouteGuard.is_protected(path):
+            if not user:
+                await log_security_event(None, ip, "unauthorized_access",
+                        f"Intento acceso a {path} sin autenticación")
+                return RedirectResponse(url="/auth/login")
+
+            plan_status = get_plan_status(user)
+
+            if plan_status == "no_plan" and RouteGuard.should_block_plan_access(path):
+                return RedirectResponse(url="/payments/checkout?plan=starter")
+
+            if plan_status == "expired" and RouteGuard.should_block_plan_access(path):
+                content = templates.get_template("errors/403.html").render({
+                    "request": request,
+                    "detail": "Tu plan ha expirado."
+                })
+                return HTMLResponse(content=content, status_code=403)
+
+        # Continuar normalmente
+        response = await call_next(request)
+        return self._add_renewed_token_if_needed(request, response)
+
+    def _add_renewed_token_if_needed(self, request, response):
+        if hasattr(request.state, "renewed_token"):
+            response.set_cookie(
+                key="access_token",
+                value=request.state.renewed_token,
+                httponly=True,
+                max_age=TokenService.token_expiry_seconds(),
+                secure=True,
+                samesite="lax"
+            )
+        return response
+
+
+class SecureHeadersMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        response = await call_next(request)
+        path = request.url.path
+
+        # Política CSP: checkout necesita más permisividad (Izipay)
+        if path.startswith("/payments/checkout"):
+            response.headers["Content-Security-Policy"] = (
+                        "default-src 'self'; "
+                        "script-src 'self' 'unsafe-inline' https://cdn.tailwindcss.com https://static.micuentaweb.pe https://secure.micuentaweb.pe https://h.online-metrix.net https://*.online-metrix.net; "
+                        "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com https://static.micuentaweb.pe https://cdn.jsdelivr.net; "
+                        "img-src 'self' data: https://img.icons8.com https://cdn.jsdelivr.net https://static.micuentaweb.pe https://h.online-metrix.net https://*.online-metrix.net; "
+                        "font-src 'self' https://fonts.gstatic.com; "
+                        "frame-src https://secure.micuentaweb.pe https://static.micuentaweb.pe https://h.online-metrix.net https://*.online-metrix.net; "
+                        "connect-src 'self' https://secure.micuentaweb.pe https://h.online-metrix.net https://*.online-metrix.net; "
+                        "object-src 'none';"
+                    )
+            response.headers["Permissions-Policy"] = "payment=(self https://secure.micuentaweb.pe)"
+        # === 2. Documentación (Swagger UI) ===
+        elif path.startswith("/docs") or path.startswith("/redoc"):
+            response.headers["Content-Security-Policy"] = (
+                "default-src 'self'; "
+                "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://cdn.jsdelivr.net; "
+                "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://fonts.googleapis.com; "
+                "img-src 'self' data: https://fastapi.tiangolo.com https://cdn.jsdelivr.net; "
+                "font-src 'self' https://fonts.gstatic.com; "
+                "object-src 'none';"
+            )
+
+        else:
+            # Política CSP estricta para el resto del sitio
+            response.headers["Content-Security-Policy"] = (
+                "default-src 'self' https://www.google.com/recaptcha/; "
+                "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://cdn.twind.style/ https://cdn.tailwindcss.com https://www.google.com/recaptcha/ https://www.gstatic.com/recaptcha/ https://www.gstatic.com/recaptcha/; "
+                "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://fonts.googleapis.com; "
+                "img-src 'self' data: https://img.icons8.com https://cdn.jsdelivr.net; "
+                "font-src 'self' https://fonts.gstatic.com; "
+                "object-src 'none';"
+            )
+            # COOP / COEP para aislamiento de origen ===
+            response.headers["Cross-Origin-Opener-Policy"] = "same-origin"
+            response.headers["Cross-Origin-Embedder-Policy"] = "same-origin"
+
+        # Seguridad HTTPS
+        if request.url.scheme == "https":
+            response.headers["Strict-Transport-Security"] = "max-age=63072000; includeSubDomains; preload"
+
+        # Evitar sniffing de tipos MIME
+        response.headers["X-Content-Type-Options"] = "nosniff"
+
+        # Protección contra clickjacking
+        response.headers["X-Frame-Options"] = (
+            "ALLOW-FROM https://secure.micuentaweb.pe"
+            if path.startswith("/payments/checkout") else
+            "DENY"
+        )
+
+        # Política de referer
+        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+
+        # Nueva: Permissions Policy
+        response.headers["Permissions-Policy"] = (
+            "accelerometer=(), camera=(), gyroscope=(), geolocation=(), microphone=(), payment=(), usb=()"
+        )
+
+        return response
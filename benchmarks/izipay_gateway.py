@@ -0,0 +1,90 @@
+"""
+Benchmark: CreatePayment con un cliente nuevo por llamada vs el IzipayClient compartido.
+
+Levanta la pasarela simulada (izipay_mock) en 127.0.0.1 con uvicorn, así cada
+cliente nuevo paga una conexión TCP real (sin TLS: contra Izipay la diferencia es mayor).
+
+Uso:
+    python benchmarks/izipay_gateway.py [--requests 500] [--concurrency 20]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+import uvicorn
+
+from app.services.payments.izipay_client import CREATE_PAYMENT, IzipayClient
+from app.services.payments.izipay_mock import izipay_mock_app
+
+ORDER = {"amount": 1990, "currency": "PEN", "orderId": 1, "customer": {"email": "bench@example.com"}}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_mock_gateway(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(izipay_mock_app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+async def fresh_client_call(base_url: str):
+    # Lo que hacía create_izipay_checkout: un AsyncClient por vista de checkout
+    async with httpx.AsyncClient() as client:
+        response = await client.post(f"{base_url}{CREATE_PAYMENT}", json=ORDER,
+                                     headers={"Authorization": "Basic YmVuY2g6YmVuY2g="})
+        response.json()
+
+
+async def run(name: str, call, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed():
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = sorted(await asyncio.gather(*(timed() for _ in range(requests))))
+    elapsed = time.perf_counter() - start
+    print(f"{name:<8} {requests / elapsed:>9.1f} req/s   p50 {latencies[len(latencies) // 2] * 1000:>6.2f} ms"
+          f"   p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:>6.2f} ms")
+
+
+async def main(requests: int, concurrency: int):
+    logging.disable(logging.INFO)
+    port = free_port()
+    server = start_mock_gateway(port)
+    base_url = f"http://127.0.0.1:{port}"
+
+    shared = IzipayClient(base_url, "bench", "bench")
+    await shared.start()
+    try:
+        await run("fresh", lambda: fresh_client_call(base_url), requests, concurrency)
+        await run("shared", lambda: shared.create_payment(ORDER), requests, concurrency)
+        print(shared.stats())
+    finally:
+        await shared.aclose()
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,136 @@
+"""
+Micro-benchmark: overhead por request del stack de middlewares.
+
+Corre la misma tabla de rutas, con un cliente en proceso (httpx + ASGITransport,
+sin red), por tres stacks:
+  - bare:     la app sin middlewares
+  - baseline: el stack anterior (BaseHTTPMiddleware), copiado en baseline_middlewares.py
+  - asgi:     el stack actual (Logger, CSRF, Auth, SecureHeaders) en ASGI puro
+
+Las rutas autenticadas usan un usuario con plan activo en la BD de DATABASE_URL
+(se crea si no existe), así que incluyen la resolución de identidad y de plan.
+
+Uso:
+    python benchmarks/middleware_overhead.py [--requests 5000]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+import baseline_middlewares as baseline
+from app.core.database import Base, SessionLocal, engine
+from app.core.middlewares.auth_middleware import AuthMiddleware
+from app.core.middlewares.logging_middleware import LoggerMiddleware
+from app.core.middlewares.security_middleware import CSRFMiddleware, SecureHeadersMiddleware
+from app.models.models import Plan, User
+from app.services.auth.token_service import TokenService
+from app.services.plans.plan_service import PlanService
+
+BENCH_EMAIL = "bench-middleware@example.com"
+BENCH_PLAN = "bench-middleware"
+CSRF_TOKEN = "bench-csrf-token"
+
+# (método, path, autenticado): una ruta por clase de RouteGuard y política de headers
+ROUTES = [
+    ("GET", "/", False),
+    ("GET", "/auth/login", False),
+    ("GET", "/docs", False),
+    ("GET", "/dashboard", True),
+    ("GET", "/payments/checkout", True),
+    ("POST", "/items", True),  # pasa además por la verificación CSRF
+]
+
+
+async def ok(request):
+    return PlainTextResponse("ok")
+
+
+def build_app(middleware: list) -> Starlette:
+    routes = [Route(path, ok, methods=[method]) for method, path, _ in ROUTES]
+    return Starlette(routes=routes, middleware=middleware)
+
+
+STACKS = {
+    "bare": [],
+    # Orden de register_middlewares en 30890af (el primero es el más externo)
+    "baseline": [
+        Middleware(baseline.CSRFMiddleware),
+        Middleware(baseline.LoggerMiddleware),
+        Middleware(baseline.AuthMiddleware),
+        Middleware(baseline.SecureHeadersMiddleware),
+    ],
+    # Mismo orden efectivo que create_app, sin las capas opcionales
+    "asgi": [
+        Middleware(LoggerMiddleware),
+        Middleware(CSRFMiddleware),
+        Middleware(AuthMiddleware),
+        Middleware(SecureHeadersMiddleware),
+    ],
+}
+
+
+def ensure_user() -> str:
+    """Usuario con plan vigente; devuelve su access token (sin claims: ambos stacks consultan)."""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        plan = db.query(Plan).filter(Plan.name == BENCH_PLAN).first()
+        if not plan:
+            plan = Plan(name=BENCH_PLAN, price=0, validity_days=3650)
+            db.add(plan)
+            db.flush()
+        user = db.query(User).filter(User.email == BENCH_EMAIL).first()
+        if not user:
+            user = User(email=BENCH_EMAIL, hashed_password="!")
+            db.add(user)
+        PlanService.assign_plan(user, plan)
+        db.commit()
+    finally:
+        db.close()
+    return TokenService.create_access_token({"sub": BENCH_EMAIL})
+
+
+async def run_route(stack: str, method: str, path: str, cookies: dict, requests: int) -> float:
+    transport = httpx.ASGITransport(app=build_app(STACKS[stack]))
+    headers = {"x-csrf-token": CSRF_TOKEN} if cookies else {}
+    async with httpx.AsyncClient(transport=transport, base_url="https://bench", cookies=cookies,
+                                 headers=headers) as client:
+        for _ in range(min(200, requests)):  # warm-up
+            response = await client.request(method, path)
+        # Una redirección significaría que el stack cortó el request antes de la ruta
+        assert response.status_code == 200, (stack, path, response.status_code)
+
+        start = time.perf_counter()
+        for _ in range(requests):
+            await client.request(method, path)
+        return (time.perf_counter() - start) / requests * 1_000_000
+
+
+async def main(requests: int):
+    # El log de acceso no forma parte de lo que se mide
+    logging.disable(logging.INFO)
+    session_cookies = {"access_token": ensure_user(), "csrf_token": CSRF_TOKEN}
+
+    print(f"{'route':<26}" + "".join(f"{name + ' us/req':>18}" for name in STACKS))
+    for method, path, authenticated in ROUTES:
+        cookies = session_cookies if authenticated else {}
+        results = [await run_route(stack, method, path, cookies, requests) for stack in STACKS]
+        print(f"{method + ' ' + path:<26}" + "".join(f"{per_request:>18.1f}" for per_request in results))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,137 @@
+"""
+Benchmark: SQLite con la configuración anterior (journal por defecto, un pool para
+todo) vs el modo de producción (WAL + pragmas + un único writer).
+
+Hilos concurrentes (como el threadpool de los handlers sync) mezclan transacciones
+de lectura y de escritura (leer cuenta, insertar evento, actualizar contador) sobre
+una base temporal.
+
+Uso:
+    python benchmarks/sqlite_writes.py [--threads 16] [--ops 300] [--write-ratio 0.3]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, String, Table, create_engine, func, insert, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import RoutingSession, create_sqlite_writer, enable_sqlite_pragmas
+
+ACCOUNTS = 50
+
+metadata = MetaData()
+accounts = Table(
+    "accounts", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("hits", Integer, nullable=False, default=0),
+)
+events = Table(
+    "events", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("account_id", Integer, ForeignKey("accounts.id"), index=True),
+    Column("kind", String(50)),
+    Column("created_at", DateTime, server_default=func.current_timestamp()),
+)
+
+
+def default_sessions(url: str):
+    # Lo que hacía app/core/database.py: create_engine sin más opciones
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    return sessionmaker(bind=engine), [engine]
+
+
+def tuned_sessions(url: str):
+    reader = create_engine(url, connect_args={"check_same_thread": False}, pool_size=16, max_overflow=0)
+    writer = create_sqlite_writer(url, connect_args={"check_same_thread": False})
+    enable_sqlite_pragmas(reader)
+    enable_sqlite_pragmas(writer)
+    return sessionmaker(bind=reader, class_=RoutingSession, writer_bind=writer), [reader, writer]
+
+
+def write_op(db, account_id: int):
+    db.execute(select(accounts.c.hits).where(accounts.c.id == account_id)).scalar()
+    db.execute(insert(events).values(account_id=account_id, kind="login_failed"))
+    db.execute(update(accounts).where(accounts.c.id == account_id).values(hits=accounts.c.hits + 1))
+    db.commit()
+
+
+def read_op(db, account_id: int):
+    db.execute(select(accounts).where(accounts.c.id == account_id)).first()
+    db.execute(select(func.count()).select_from(events).where(events.c.account_id == account_id)).scalar()
+    db.commit()
+
+
+def run(name: str, factory, threads: int, ops: int, write_ratio: float):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    url = f"sqlite:///{path}"
+    setup = create_engine(url)
+    metadata.create_all(setup)
+    with setup.begin() as conn:
+        conn.execute(insert(accounts), [{"id": i, "hits": 0} for i in range(1, ACCOUNTS + 1)])
+    setup.dispose()
+
+    Session, engines = factory(url)
+    latencies = {"write": [], "read": []}
+    errors = {"write": 0, "read": 0}
+    lock = threading.Lock()
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        for _ in range(ops):
+            kind = "write" if rng.random() < write_ratio else "read"
+            start = time.perf_counter()
+            db = Session()
+            try:
+                (write_op if kind == "write" else read_op)(db, rng.randint(1, ACCOUNTS))
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies[kind].append(elapsed)
+            except OperationalError:
+                db.rollback()
+                with lock:
+                    errors[kind] += 1
+            finally:
+                db.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(worker, range(threads)))
+    total = time.perf_counter() - start
+
+    for engine in engines:
+        engine.dispose()
+
+    def p(values: list, q: float) -> float:
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000 if ordered else 0.0
+
+    done = len(latencies["write"]) + len(latencies["read"])
+    print(f"{name:<8} {done / total:8.0f} ops/s   "
+          f"write p50 {p(latencies['write'], 0.5):7.1f} ms  p95 {p(latencies['write'], 0.95):7.1f} ms   "
+          f"read p95 {p(latencies['read'], 0.95):6.1f} ms   "
+          f"errores write/read {errors['write']}/{errors['read']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=300)
+    parser.add_argument("--write-ratio", type=float, default=0.3)
+    args = parser.parse_args()
+
+    print(f"{args.threads} hilos x {args.ops} operaciones, {args.write_ratio:.0%} escrituras")
+    run("default", default_sessions, args.threads, args.ops, args.write_ratio)
+    run("tuned", tuned_sessions, args.threads, args.ops, args.write_ratio)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import os
+import sys
+import tempfile
+import uuid
+
+# Settings es un singleton que se lee al importar app.*: el entorno de tests va antes.
+# BD SQLite temporal y dependencias externas simuladas en proceso (sin red)
+TEST_DIR = tempfile.mkdtemp(prefix="app-tests-")
+os.environ.update({
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "REFRESH_TOKEN_EXPIRE_DAYS": "7",
+    "SMTP_PROVIDER": "gmail",
+    "DATABASE_URL": f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}",
+    "HAS_FREE_DEMO": "true",
+    "FREE_PLAN_NAME": "free",
+    "PAYMENT_GATEWAY": "izipay",
+    "IZIPAY_BACKEND": "mock",
+    "IZIPAY_HMACSHA256": "test-hmac",
+    "RECAPTCHA_BACKEND": "fake",
+    "BCRYPT_ROUNDS": "4",
+    "ACCESS_LOG_ENABLED": "false",
+})
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+from fastapi.testclient import TestClient
+
+PASSWORD = "Secr3t!pass"
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app.main import app
+    # Todos los tests salen de la misma IP: sin esto los de login/registro chocan con el rate limit
+    app.state.limiter.enabled = False
+    return app
+
+
+@pytest.fixture
+def client(app):
+    # https: la cookie csrf_token es Secure
+    with TestClient(app, base_url="https://testserver") as client:
+        yield client
+
+
+@pytest.fixture
+def user_client(client):
+    """Cliente con un usuario recién registrado y logueado; client.email tiene su email."""
+    email = f"user-{uuid.uuid4().hex[:10]}@example.com"
+    response = client.post("/auth/register", data={
+        "email": email,
+        "password": PASSWORD,
+        "confirm_password": PASSWORD,
+        "full_name": "Test",
+        "phone_number": "999999999",
+        "accept_dpa": "true",
+        "g_recaptcha_response_register": "register",
+    }, follow_redirects=False)
+    assert response.status_code in (302, 303), response.text
+    client.cookies.clear()
+
+    response = client.post("/auth/login", data={
+        "email": email,
+        "password": PASSWORD,
+        "g_recaptcha_response": "login",
+    }, follow_redirects=False)
+    assert response.status_code in (302, 303), response.text
+
+    # Un GET deja la cookie csrf_token para los POST/DELETE autenticados
+    client.get("/dashboard/items")
+    client.email = email
+    return client
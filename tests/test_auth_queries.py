@@ -0,0 +1,68 @@
+import pytest
+from prometheus_client import REGISTRY
+from app.core.hooks.query_stats import query_budget
+from app.services.auth.token_service import TokenService
+from app.services.users.user_cache import user_cache
+
+
+@pytest.fixture
+def decode_counter(monkeypatch):
+    calls = []
+    decode = TokenService.decode_token
+
+    def counting_decode(token):
+        calls.append(token)
+        return decode(token)
+
+    monkeypatch.setattr(TokenService, "decode_token", staticmethod(counting_decode))
+    return calls
+
+
+def user_queries(statements: list[str]) -> list[str]:
+    return [statement for statement in statements if "FROM users" in statement]
+
+
+@pytest.mark.parametrize("method, path", [
+    ("GET", "/dashboard/profile"),
+    ("POST", "/items"),  # pasa además por CSRFMiddleware
+])
+def test_authenticated_request_resolves_user_once(user_client, decode_counter, method, path):
+    headers = {"x-csrf-token": user_client.cookies.get("csrf_token")}
+    # Sin caché: el usuario se tiene que cargar de la BD, pero una sola vez
+    user_cache.clear()
+
+    with query_budget(10) as recorder:
+        response = user_client.request(method, path, data={"name": "x"} if method == "POST" else None,
+                                       headers=headers)
+
+    assert response.status_code == 200
+    assert len(decode_counter) == 1
+    assert len(user_queries(recorder.statements)) == 1
+
+
+def test_cached_user_needs_no_user_query(user_client, decode_counter):
+    user_client.get("/dashboard/profile")
+    decode_counter.clear()
+
+    with query_budget(0):
+        response = user_client.get("/dashboard/profile")
+
+    assert response.status_code == 200
+    assert len(decode_counter) == 1
+
+
+def cache_lookups(result: str) -> float:
+    return REGISTRY.get_sample_value("user_cache_lookups_total", {"result": result}) or 0.0
+
+
+def test_user_cache_lookups_are_exported(user_client):
+    user_cache.clear()
+    user_client.get("/dashboard/profile")
+    hits, misses = cache_lookups("hit"), cache_lookups("miss")
+
+    response = user_client.get("/dashboard/profile")
+
+    assert response.status_code == 200
+    assert cache_lookups("hit") == hits + 1
+    assert cache_lookups("miss") == misses
+    assert REGISTRY.get_sample_value("user_cache_size") == user_cache.stats()["size"] >= 1
@@ -0,0 +1,75 @@
+import asyncio
+import random
+import pytest
+from prometheus_client import REGISTRY
+from app.core.batch_writer import OVERFLOW_DROP, OVERFLOW_SAMPLE, BatchWriter
+from app.models.models import SecurityLog
+
+
+@pytest.fixture(autouse=True)
+def schema(client):
+    # El lifespan de la app crea las tablas
+    return client
+
+
+def metric(name: str, writer: BatchWriter) -> float:
+    return REGISTRY.get_sample_value(name, {"writer": writer.name}) or 0.0
+
+
+def make_writer(overflow: str) -> BatchWriter:
+    # Sin flush por tamaño ni por tiempo durante el test: sólo el de stop()
+    return BatchWriter(SecurityLog, batch_size=1000, flush_interval=60, max_pending=3, overflow=overflow)
+
+
+def fill(writer: BatchWriter, rows: int) -> list[dict]:
+    """Agrega `rows` eventos con el writer iniciado y devuelve el buffer antes del flush final."""
+    async def scenario():
+        await writer.start()
+        for n in range(rows):
+            writer.add(ip_address="127.0.0.1", event_type="test_overflow", description=f"evento {n}")
+        buffered = list(writer._buffer)
+        assert metric("batch_writer_pending", writer) == len(buffered)
+        await writer.stop()
+        return buffered
+
+    return asyncio.run(scenario())
+
+
+def test_drop_policy_keeps_first_rows_and_counts_the_rest():
+    writer = make_writer(OVERFLOW_DROP)
+    dropped_before = metric("batch_writer_dropped_total", writer)
+
+    buffered = fill(writer, 5)
+
+    assert [row["description"] for row in buffered] == ["evento 0", "evento 1", "evento 2"]
+    assert writer.dropped == 2
+    assert metric("batch_writer_dropped_total", writer) == dropped_before + 2
+    assert writer.written == 3
+    assert metric("batch_writer_pending", writer) == 0
+
+
+def test_sample_policy_keeps_a_sample_of_the_whole_burst(monkeypatch):
+    monkeypatch.setattr(random, "randrange", random.Random(7).randrange)
+    writer = make_writer(OVERFLOW_SAMPLE)
+    dropped_before = metric("batch_writer_dropped_total", writer)
+
+    buffered = fill(writer, 50)
+
+    descriptions = {row["description"] for row in buffered}
+    assert len(descriptions) == 3
+    # El reservoir reemplaza filas del inicio por otras de la ráfaga
+    assert descriptions - {"evento 0", "evento 1", "evento 2"}
+    assert writer.dropped == 47
+    assert metric("batch_writer_dropped_total", writer) == dropped_before + 47
+    assert writer.written == 3
+
+
+def test_failed_writes_are_counted():
+    writer = make_writer(OVERFLOW_DROP)
+    failed_before = metric("batch_writer_failed_total", writer)
+
+    # Sin iniciar escribe en línea; ip_address es NOT NULL
+    writer.add(ip_address=None, event_type="test_overflow")
+
+    assert writer.failed == 1
+    assert metric("batch_writer_failed_total", writer) == failed_before + 1
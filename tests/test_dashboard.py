@@ -0,0 +1,17 @@
+from app.core.database import SessionLocal
+from app.models.models import Order, OrderStatus, User
+
+
+def test_orders_page_renders_order_of_unknown_plan(user_client):
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == user_client.email).one()
+        db.add(Order(user_id=user.id, plan_id=987654, status=OrderStatus.CANCELED))
+        db.commit()
+    finally:
+        db.close()
+
+    response = user_client.get("/dashboard/orders")
+
+    assert response.status_code == 200
+    assert "Plan #987654" in response.text
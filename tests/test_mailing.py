@@ -0,0 +1,102 @@
+import asyncio
+import smtplib
+import threading
+import time
+from email.mime.text import MIMEText
+from app.services.mailing import mail_outbox as outbox_module
+from app.services.mailing.mail_outbox import MailOutbox, OutgoingMail
+from app.services.mailing.mail_service import SmtpConnectionPool
+
+CONFIG = {"host": "localhost", "port": 25, "security": "none", "user": "app@example.com", "pass": ""}
+
+
+class FakeServer:
+    def __init__(self, alive: bool = True):
+        self.alive = alive
+        self.closed = False
+        self.sent = []
+
+    def sendmail(self, sender, to_email, body):
+        if not self.alive:
+            raise smtplib.SMTPServerDisconnected("gone")
+        self.sent.append(to_email)
+
+    def quit(self):
+        if not self.alive:
+            raise smtplib.SMTPServerDisconnected("gone")
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+def test_dead_reused_connection_is_closed_and_replaced(monkeypatch):
+    pool = SmtpConnectionPool(CONFIG, size=1, idle_seconds=60, timeout=1)
+    dead, fresh = FakeServer(alive=False), FakeServer()
+    monkeypatch.setattr(pool, "_connect", lambda: fresh)
+    pool._idle.put((dead, float("inf")))
+
+    pool.send(MIMEText("hola"), "user@example.com")
+
+    assert dead.closed
+    assert fresh.sent == ["user@example.com"]
+    assert pool._idle.get_nowait()[0] is fresh
+
+
+def test_stop_waits_for_failed_mail_writes(monkeypatch):
+    stored = []
+
+    def slow_store(mails):
+        time.sleep(0.05)
+        stored.extend(mails)
+
+    monkeypatch.setattr(outbox_module, "store_failed_mails", slow_store)
+
+    async def scenario():
+        outbox = MailOutbox(SmtpConnectionPool(CONFIG, size=1, idle_seconds=60, timeout=1), workers=1, max_size=1)
+        await outbox.start()
+        # Cola llena y worker ocupado: el reintento que vence no entra y va a failed_mails
+        outbox._queue.put_nowait(OutgoingMail("a", "a", "a@example.com"))
+        mail = OutgoingMail("b", "b", "b@example.com", attempts=1)
+        outbox._retrying[id(mail)] = (None, mail)
+        for task in outbox._tasks:
+            task.cancel()
+        outbox._requeue(id(mail))
+        assert len(outbox._background) == 1
+
+        outbox._queue.get_nowait()
+        outbox._queue.task_done()
+        await outbox.stop()
+        return mail
+
+    mail = asyncio.run(scenario())
+    assert stored == [mail]
+
+
+def test_mail_in_flight_at_drain_timeout_is_stored(monkeypatch):
+    stored = []
+    release = threading.Event()
+    monkeypatch.setattr(outbox_module, "store_failed_mails", stored.extend)
+    monkeypatch.setattr(outbox_module.settings, "MAIL_DRAIN_TIMEOUT_SECONDS", 0.05)
+
+    class BlockedPool:
+        def send(self, msg, to_email):
+            release.wait(5)
+
+        def close_all(self):
+            pass
+
+    async def scenario():
+        outbox = MailOutbox(BlockedPool(), workers=1, max_size=10)
+        await outbox.start()
+        outbox.enqueue("lento", "cuerpo", "slow@example.com")
+        await asyncio.sleep(0.01)
+        stop = asyncio.create_task(outbox.stop())
+        await asyncio.sleep(0.2)
+        # El hilo SMTP sigue bloqueado: stop() no debe perder el correo al cancelar el worker
+        release.set()
+        await stop
+
+    asyncio.run(scenario())
+    assert [mail.to_email for mail in stored] == ["slow@example.com"]
+    assert stored[0].last_error == "Envío interrumpido por el apagado"
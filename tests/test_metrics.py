@@ -0,0 +1,22 @@
+import pytest
+from app.api import metrics
+
+
+@pytest.fixture
+def metrics_token(monkeypatch):
+    monkeypatch.setattr(metrics.settings, "METRICS_TOKEN", "metrics-secret")
+    return "metrics-secret"
+
+
+def test_metrics_requires_bearer_token(client, metrics_token):
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+    response = client.get("/metrics", headers={"Authorization": f"Bearer {metrics_token}"})
+    assert response.status_code == 200
+    assert "http_requests" in response.text
+
+
+def test_metrics_non_ascii_token_is_rejected_not_crashing(client, metrics_token):
+    response = client.get("/metrics", headers={"Authorization": "Bearer \xe9".encode("latin-1")})
+    assert response.status_code == 401
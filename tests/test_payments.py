@@ -0,0 +1,80 @@
+import re
+from app.core.database import SessionLocal
+from app.models.models import Order, OrderStatus, User
+from app.services.payments.izipay_mock import build_paid_answer, sign_answer
+from app.services.plans.plan_catalog import plan_catalog
+
+
+def test_mock_paid_answer_completes_checkout(user_client):
+    response = user_client.get("/payments/checkout", params={"plan": "free"})
+    assert response.status_code == 200
+    assert re.search(r"mock-[0-9a-f]+", response.text)
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == user_client.email).one()
+        order = db.query(Order).filter(Order.user_id == user.id).order_by(Order.id.desc()).first()
+        order_id = order.id
+    finally:
+        db.close()
+
+    response = user_client.post("/payments/paid", data=sign_answer(build_paid_answer(order_id, 0)))
+    assert response.status_code == 200
+    assert f"Orden #{order_id}" in response.text
+
+    db = SessionLocal()
+    try:
+        order = db.get(Order, order_id)
+        assert order.status == OrderStatus.PAID
+        assert order.user.plan_id == order.plan_id
+    finally:
+        db.close()
+
+
+def create_order(email: str, plan_id: int) -> tuple[int, int]:
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == email).one()
+        order = Order(user_id=user.id, plan_id=plan_id, status=OrderStatus.PENDING)
+        db.add(order)
+        db.commit()
+        return order.id, user.id
+    finally:
+        db.close()
+
+
+def test_paid_order_with_plan_missing_from_catalog_assigns_it_from_db(user_client, monkeypatch):
+    free_plan = plan_catalog.get_by_name("free")
+    order_id, user_id = create_order(user_client.email, free_plan.id)
+    # Catálogo desactualizado: el plan existe en la BD pero no en memoria
+    monkeypatch.setattr(plan_catalog, "get_by_id", lambda plan_id: None)
+
+    response = user_client.post("/payments/paid", data=sign_answer(build_paid_answer(order_id, 0)))
+
+    assert response.status_code == 200
+    db = SessionLocal()
+    try:
+        assert db.get(Order, order_id).status == OrderStatus.PAID
+        assert db.get(User, user_id).plan_id == free_plan.id
+    finally:
+        db.close()
+
+
+def test_paid_order_with_deleted_plan_is_still_marked_paid(user_client):
+    order_id, user_id = create_order(user_client.email, 987654)
+    db = SessionLocal()
+    try:
+        plan_before = db.get(User, user_id).plan_id
+    finally:
+        db.close()
+
+    response = user_client.post("/payments/paid", data=sign_answer(build_paid_answer(order_id, 0)))
+
+    assert response.status_code == 200
+    db = SessionLocal()
+    try:
+        assert db.get(Order, order_id).status == OrderStatus.PAID
+        # El plan del usuario no cambia (el de la orden ya no existe)
+        assert db.get(User, user_id).plan_id == plan_before
+    finally:
+        db.close()
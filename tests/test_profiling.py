@@ -0,0 +1,35 @@
+import os
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from app.core.middlewares import profiling_middleware
+from app.core.middlewares.profiling_middleware import ProfilingMiddleware
+
+
+@pytest.fixture
+def profiled_client(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling_middleware.settings, "PROFILE_ADMIN_TOKEN", "profile-secret")
+    monkeypatch.setattr(profiling_middleware.settings, "PROFILE_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(profiling_middleware.settings, "PROFILE_DIR", str(tmp_path))
+
+    async def hello(request):
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/", hello)])
+    with TestClient(ProfilingMiddleware(app)) as client:
+        yield client, tmp_path
+
+
+def test_valid_token_writes_profile(profiled_client):
+    client, directory = profiled_client
+    assert client.get("/", headers={"X-Profile-Token": "profile-secret"}).text == "ok"
+    assert len(os.listdir(directory)) == 1
+
+
+def test_wrong_or_non_ascii_token_is_ignored(profiled_client):
+    client, directory = profiled_client
+    assert client.get("/", headers={"X-Profile-Token": "wrong"}).status_code == 200
+    assert client.get("/", headers={"X-Profile-Token": "\xe9".encode("latin-1")}).status_code == 200
+    assert os.listdir(directory) == []
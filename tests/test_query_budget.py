@@ -0,0 +1,12 @@
+import pytest
+from app.core.hooks.query_stats import query_budget
+
+
+def test_query_budget_sees_async_and_writer_engines(user_client):
+    # POST /items corre en el engine async y el INSERT va por el writer
+    with pytest.raises(AssertionError, match="presupuesto 0"):
+        with query_budget(0) as recorder:
+            response = user_client.post("/items", data={"name": "budget"},
+                                        headers={"x-csrf-token": user_client.cookies.get("csrf_token")})
+    assert response.status_code == 200
+    assert any(statement.startswith("INSERT INTO items") for statement in recorder.statements)
@@ -0,0 +1,25 @@
+import pytest
+from sqlalchemy import create_engine
+from app.core.database import Base
+from app.core.query_plans import assert_hot_queries_indexed
+
+
+@pytest.fixture
+def schema_engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_hot_queries_use_indexes(schema_engine):
+    assert_hot_queries_indexed(schema_engine)
+
+
+def test_dropped_index_fails_the_check(schema_engine):
+    orders = Base.metadata.tables["orders"]
+    index = next(index for index in orders.indexes if index.name == "ix_orders_status_created_at")
+    index.drop(schema_engine)
+
+    with pytest.raises(AssertionError, match="cleanup_pending_orders"):
+        assert_hot_queries_indexed(schema_engine)
@@ -0,0 +1,24 @@
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from app.core.database import create_replica_engine
+
+
+def checkouts(label: str) -> float:
+    return REGISTRY.get_sample_value("db_pool_checkout_wait_seconds_count", {"engine": label}) or 0.0
+
+
+def test_replica_pool_wait_is_labelled_per_replica(tmp_path):
+    replica = create_replica_engine(f"sqlite:///{tmp_path / 'replica.db'}", 3)
+    try:
+        assert replica.pool.metrics_label == "replica-3"
+        sync_before, replica_before = checkouts("sync"), checkouts("replica-3")
+        with replica.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        assert checkouts("replica-3") == replica_before + 1
+        assert checkouts("sync") == sync_before
+
+        # La etiqueta sobrevive a la recreación del pool (dispose, failover)
+        replica.dispose()
+        assert replica.pool.metrics_label == "replica-3"
+    finally:
+        replica.dispose()
@@ -0,0 +1,18 @@
+from app.core.middlewares import logging_middleware
+from app.services.users.user_cache import user_cache
+
+
+def test_request_stats_include_csrf_identity_lookup(user_client, monkeypatch):
+    reported = []
+    monkeypatch.setattr(logging_middleware, "report_repeated_queries",
+                        lambda stats, route: reported.append(stats))
+    # Sin caché, el POST autenticado resuelve al usuario (una consulta) ya en CSRFMiddleware
+    user_cache.clear()
+
+    response = user_client.post("/items", data={"name": "stats"},
+                                headers={"x-csrf-token": user_client.cookies.get("csrf_token")})
+
+    assert response.status_code == 200
+    [stats] = reported
+    assert any("FROM users" in statement for statement in stats.query_shapes)
+    assert stats.db_queries == sum(stats.query_shapes.values())
@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from app.core.middlewares import security_middleware
+from app.core.middlewares.security_middleware import HeaderPolicy, SecureHeadersMiddleware
+from app.utils.constants import CSP_DEFAULT
+
+
+def test_default_policy_headers(client):
+    response = client.get("/")
+
+    assert response.headers["content-security-policy"] == CSP_DEFAULT
+    assert response.headers["x-frame-options"] == "DENY"
+    assert "strict-transport-security" in response.headers
+
+
+def test_checkout_policy_allows_the_payment_frame(user_client):
+    response = user_client.get("/payments/checkout", params={"plan": "free"})
+
+    assert "https://secure.micuentaweb.pe" in response.headers["content-security-policy"]
+    assert "payment=(self https://secure.micuentaweb.pe)" in response.headers["permissions-policy"]
+
+
+NONCE_CSP = "default-src 'self'; script-src 'self' 'nonce-{nonce}'"
+
+
+def test_nonce_placeholder_is_stripped_when_disabled():
+    policy = HeaderPolicy(NONCE_CSP, {}, nonce_enabled=False)
+
+    assert not policy.uses_nonce
+    # Sin flag la política es la tupla precalculada, igual para todos los responses
+    assert policy.render("https") is policy.raw_https
+    assert dict(policy.raw_http)[b"content-security-policy"] == b"default-src 'self'; script-src 'self'"
+
+
+def test_nonce_is_fresh_per_response_and_exposed_to_the_request(monkeypatch):
+    monkeypatch.setattr(security_middleware, "get_settings",
+                        lambda: SimpleNamespace(CSP_DEFAULT=NONCE_CSP, CSP_CHECKOUT="", CSP_DOCS="",
+                                                CSP_NONCE_ENABLED=True))
+
+    async def page(request):
+        return PlainTextResponse(request.state.csp_nonce)
+
+    app = SecureHeadersMiddleware(Starlette(routes=[Route("/", page)]))
+    with TestClient(app, base_url="https://testserver") as client:
+        first, second = client.get("/"), client.get("/")
+
+    assert first.text != second.text
+    for response in (first, second):
+        csp = response.headers["content-security-policy"]
+        assert csp == NONCE_CSP.replace("{nonce}", response.text)
+        assert len(response.headers.get_list("content-security-policy")) == 1
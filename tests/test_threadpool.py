@@ -0,0 +1,24 @@
+import logging
+import anyio.to_thread
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+from app.core import database
+
+
+def test_threadpool_keeps_anyio_default(client):
+    limiter = client.portal.call(anyio.to_thread.current_default_thread_limiter)
+
+    assert limiter.total_tokens == 40
+
+
+def test_pool_smaller_than_threadpool_warns(monkeypatch, caplog):
+    small = create_engine("sqlite://", poolclass=QueuePool, pool_size=2, max_overflow=3)
+    monkeypatch.setattr(database, "engine", small)
+
+    with caplog.at_level(logging.WARNING, logger=database.logger.name):
+        database.check_pool_capacity(5)
+        assert not caplog.records
+        database.check_pool_capacity(40)
+
+    assert "(5 conexiones" in caplog.text and "(40 hilos)" in caplog.text
+    small.dispose()
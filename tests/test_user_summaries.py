@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from sqlalchemy import delete
+from app.core.database import SessionLocal
+from app.models.models import Item, Order, OrderStatus, User, UserSummary
+from app.services.payments.izipay_service import cleanup_pending_orders
+from app.services.users.user_summary_service import UserSummaryService
+
+
+def summary_of(user_id: int):
+    db = SessionLocal()
+    try:
+        return UserSummaryService.get(db, user_id)
+    finally:
+        db.close()
+
+
+def counters(summary: dict) -> tuple:
+    return (summary["item_count"], summary["order_count"], summary["pending_orders"],
+            summary["paid_orders"], summary["canceled_orders"])
+
+
+def new_user(db) -> User:
+    user = User(email=f"summary-{datetime.utcnow().timestamp()}@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_counters_follow_inserts_status_changes_and_cleanup(app):
+    db = SessionLocal()
+    try:
+        user = new_user(db)
+        assert counters(summary_of(user.id)) == (0, 0, 0, 0, 0)
+
+        stale = Order(user_id=user.id, plan_id=1, status=OrderStatus.PENDING)
+        canceled = Order(user_id=user.id, plan_id=1, status=OrderStatus.PENDING)
+        db.add_all([Item(name="a", owner_id=user.id), Item(name="b", owner_id=user.id), stale, canceled])
+        db.commit()
+        assert counters(summary_of(user.id)) == (2, 2, 2, 0, 0)
+
+        # Tras el commit los atributos están expirados: el cambio de estado igual se detecta
+        canceled.status = OrderStatus.CANCELED
+        db.commit()
+        assert counters(summary_of(user.id)) == (2, 2, 1, 0, 1)
+
+        stale.created_at = datetime.utcnow() - timedelta(hours=3)
+        db.commit()
+        cleanup_pending_orders(db)
+        assert counters(summary_of(user.id)) == (2, 1, 0, 0, 1)
+
+        db.add(Order(user_id=user.id, plan_id=1, status=OrderStatus.PAID))
+        db.flush()
+        db.rollback()
+        assert counters(summary_of(user.id)) == (2, 1, 0, 0, 1)
+    finally:
+        db.close()
+
+
+def test_missing_summary_row_is_not_overcounted(app):
+    db = SessionLocal()
+    try:
+        user = new_user(db)
+        db.add_all([Item(name=f"item-{i}", owner_id=user.id) for i in range(3)])
+        db.commit()
+        db.execute(delete(UserSummary).where(UserSummary.user_id == user.id))
+        db.commit()
+
+        # Varias filas en un mismo flush sin fila de resumen
+        db.add_all([Item(name="d", owner_id=user.id), Item(name="e", owner_id=user.id)])
+        db.commit()
+        assert summary_of(user.id)["item_count"] == 5
+
+        UserSummaryService.rebuild(db, only_missing=True)
+        db.add(Item(name="f", owner_id=user.id))
+        db.commit()
+        assert db.get(UserSummary, user.id).item_count == 6
+    finally:
+        db.close()
+
+
+def test_rebuild_matches_incremental_counters(app):
+    db = SessionLocal()
+    try:
+        before = {row.user_id: counters(row.__dict__) for row in db.query(UserSummary).all()}
+        UserSummaryService.rebuild(db)
+        db.expire_all()
+        after = {row.user_id: counters(row.__dict__) for row in db.query(UserSummary).all()}
+        assert before == after
+    finally:
+        db.close()